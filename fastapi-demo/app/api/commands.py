@@ -1,8 +1,9 @@
 from typing import Dict, Any
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from pydantic import BaseModel
 from app.dependencies import get_command_handler
 from app.services.command_handler import CommandHandler
+from app.services.event_store import ConcurrencyError
 
 router = APIRouter()
 
@@ -19,10 +20,24 @@ class CancelOrderRequest(BaseModel):
 @router.post("/orders")
 async def create_order(
     request: CreateOrderRequest,
+    response: Response,
+    prefer: str | None = Header(None),
     handler: CommandHandler = Depends(get_command_handler)
 ) -> Dict[str, str]:
-    """Create new order endpoint."""
-    saga_id: str = await handler.handle_create_order(request.model_dump())
+    """Create new order endpoint.
+
+    With `Prefer: respond-async` it answers 202 once the saga is queued; poll
+    the Location for its progress.
+    """
+    respond_async: bool = prefer is not None and "respond-async" in prefer.lower()
+    try:
+        saga_id: str = await handler.handle_create_order(request.model_dump(), wait=not respond_async)
+    except ConcurrencyError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    if respond_async:
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = f"/api/v1/sagas/{saga_id}"
+        response.headers["Preference-Applied"] = "respond-async"
     return {"saga_id": saga_id, "order_id": request.id}
 
 @router.post("/orders/{order_id}/cancel")
@@ -32,6 +47,9 @@ async def cancel_order(
     handler: CommandHandler = Depends(get_command_handler)
 ) -> Dict[str, str]:
     """Cancel order endpoint."""
-    await handler.handle_cancel_order(order_id, request.reason)
+    try:
+        await handler.handle_cancel_order(order_id, request.reason)
+    except ConcurrencyError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
     return {"status": "cancelled", "order_id": order_id}
 
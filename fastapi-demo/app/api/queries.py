@@ -1,6 +1,11 @@
-from typing import Dict, Any, List
-from fastapi import APIRouter, Depends
-from app.dependencies import get_query_handler
+from typing import AsyncIterator, Dict, Any, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.core import settings
+from app.core.responses import SSE_KEEPALIVE, sse_message
+from app.dependencies import get_query_handler, get_event_store, get_broadcaster
+from app.services.broadcaster import EventBroadcaster, stream_events
+from app.services.event_store import EventStore
 from app.services.query_handler import QueryHandler
 
 router = APIRouter()
@@ -21,3 +26,60 @@ async def list_orders(
     """List orders for user endpoint."""
     return await handler.list_orders(user_id)
 
+
+@router.get("/sagas/{saga_id}")
+async def get_saga(
+    saga_id: str,
+    handler: QueryHandler = Depends(get_query_handler)
+) -> Dict[str, Any]:
+    """Get saga progress endpoint."""
+    saga = await handler.get_saga(saga_id)
+    if saga is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Saga {saga_id} not found!")
+    return saga
+
+async def _sse_stream(
+    event_store: EventStore, broadcaster: EventBroadcaster, after: int, follow: bool
+) -> AsyncIterator[bytes]:
+    async for event in stream_events(
+        event_store,
+        broadcaster,
+        after=after,
+        follow=follow,
+        batch_size=settings.events_catchup_batch_size,
+        keepalive=settings.events_keepalive_seconds,
+    ):
+        if event is None:
+            yield SSE_KEEPALIVE
+            continue
+        yield sse_message(
+            {
+                "aggregate_id": event.aggregate_id,
+                "sequence": event.sequence,
+                "timestamp": event.timestamp,
+                "data": event.data,
+            },
+            event_id=event.position,
+            event=event.event_type,
+        )
+
+@router.get("/events")
+async def subscribe_events(
+    after: int = Query(0, ge=0),
+    follow: bool = True,
+    last_event_id: str | None = Header(None),
+    event_store: EventStore = Depends(get_event_store),
+    broadcaster: EventBroadcaster = Depends(get_broadcaster),
+) -> StreamingResponse:
+    """Stream the event log as Server-Sent Events.
+
+    Sends every event after position `after` (or the Last-Event-ID of a
+    reconnecting client), then live events unless follow=false.
+    """
+    if last_event_id is not None and last_event_id.isdigit():
+        after = int(last_event_id)
+    return StreamingResponse(
+        _sse_stream(event_store, broadcaster, after=after, follow=follow),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # optional: pip install redis
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    """The request is refused before it reaches a route."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class RateLimiter(ABC):
+    """Per-client token bucket: rate tokens per second, up to burst."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+
+    @abstractmethod
+    async def acquire(self, key: str) -> float:
+        """Take one token for key; returns 0 or the seconds until one is available."""
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Token buckets of this process, least recently seen clients evicted first."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 100_000) -> None:
+        super().__init__(rate, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take a token atomically, on the Redis clock so all workers agree.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Token buckets shared by all workers through Redis.
+
+    Fails open: while Redis is unreachable requests are not rate limited.
+    """
+
+    def __init__(self, url: str, rate: float, burst: int, prefix: str = "ratelimit:") -> None:
+        if aioredis is None:
+            raise ImportError("The Redis rate limiter requires the redis package")
+        super().__init__(rate, burst)
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str) -> float:
+        try:
+            wait = await self._script(keys=[self.prefix + key], args=[self.rate, self.burst])
+        except (RedisError, OSError):
+            logger.warning("Rate limiter backend unavailable, admitting request", exc_info=True)
+            return 0.0
+        return float(wait)
+
+
+class ConcurrencyLimiter:
+    """At most limit requests at once; up to max_queued wait, first come first served."""
+
+    def __init__(self, limit: int, max_queued: int, queue_timeout: float) -> None:
+        self.limit = limit
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active: int = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot; False when the queue is full or the wait timed out."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queued:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # A slot handed over just before the cancellation is passed on.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic sleep."""
+
+    def __init__(self, interval: float = 0.1) -> None:
+        self.interval = interval
+        self.lag: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - start - self.interval, 0.0)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.lag = 0.0
+
+
+class AdmissionController:
+    """Decides whether a request may run now, in the order cheapest check first.
+
+    Per-client rate limit (429), then overload shedding when the event loop
+    lags or too many callers already wait for a DB connection (503), then a
+    slot of the global concurrency limit, waiting in a bounded queue (503).
+    """
+
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency: Optional[ConcurrencyLimiter] = None,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        max_loop_lag: float = 0.0,
+        pool_status: Optional[Callable[[], Dict]] = None,
+        max_pool_waiting: int = 0,
+        retry_after: float = 1.0,
+    ) -> None:
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.loop_monitor = loop_monitor
+        self.max_loop_lag = max_loop_lag
+        self.pool_status = pool_status
+        self.max_pool_waiting = max_pool_waiting
+        self.retry_after = retry_after
+
+    def _pool_saturated(self) -> bool:
+        if self.pool_status is None or self.max_pool_waiting <= 0:
+            return False
+        return self.pool_status()["primary"].get("waiting", 0) >= self.max_pool_waiting
+
+    async def admit(self, client_key: str) -> None:
+        """Raise Rejected, or take a concurrency slot to be given back with release()."""
+        if self.rate_limiter is not None:
+            wait = await self.rate_limiter.acquire(client_key)
+            if wait > 0:
+                raise Rejected(429, "Too many requests", wait)
+
+        if self.loop_monitor is not None and 0 < self.max_loop_lag <= self.loop_monitor.lag:
+            raise Rejected(503, "Server overloaded", max(self.retry_after, self.loop_monitor.lag))
+        if self._pool_saturated():
+            raise Rejected(503, "Server overloaded", self.retry_after)
+
+        if self.concurrency is not None and not await self.concurrency.acquire():
+            raise Rejected(503, "Server overloaded", self.retry_after)
+
+    def release(self) -> None:
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying an AdmissionController to selected paths.
+
+    get_controller is called per request so the controller can be replaced
+    (e.g. reconfigured) without rebuilding the middleware stack.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        get_controller: Callable[[], AdmissionController],
+        paths: Sequence[str] = ("/",),
+        exempt_paths: Sequence[str] = (),
+        key_header: str = "",
+    ) -> None:
+        self.app = app
+        self.get_controller = get_controller
+        self.paths = tuple(paths)
+        self.exempt_paths = tuple(exempt_paths)
+        self.key_header = key_header.lower().encode()
+
+    def _client_key(self, scope: Scope) -> str:
+        if self.key_header:
+            for name, value in scope["headers"]:
+                if name == self.key_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "anonymous"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path: str = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(self.paths)
+            or path.startswith(self.exempt_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.get_controller()
+        try:
+            await controller.admit(self._client_key(scope))
+        except Rejected as rejected:
+            response = JSONResponse(
+                {"detail": rejected.detail},
+                status_code=rejected.status_code,
+                headers={"Retry-After": str(max(math.ceil(rejected.retry_after), 1))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
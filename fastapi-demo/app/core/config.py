@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import List
 
 import dotenv
 from pydantic_settings import BaseSettings
@@ -22,9 +23,8 @@ def get_db_urls():
         port = os.getenv("POSTGRES_PORT", "5432")
         return f"postgresql+{engine}://{user}:{password}@{host}:{port}/{db_name}"
     else:
+        # The directory is created on startup (DB.ensure_sqlite_directory), not on import.
         db_path = os.getenv("SQLITE_PATH", "data/fastapi.db")
-        db_dir = Path(db_path).parent
-        db_dir.mkdir(parents=True, exist_ok=True)
         return f"sqlite+aiosqlite:///{db_path}"
 
 
@@ -37,6 +37,93 @@ class Settings(BaseSettings):
     db_url: str = get_db_urls()
 
     db_echo: bool = DEBUG
+    # Create missing tables on startup; turn off where `python cli.py migrate` runs as its own step.
+    db_create_all: bool = True
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 100
+    db_prepared_statements: bool = True
+
+    db_replica_urls: str = ""
+    db_replica_strategy: str = "round_robin"
+    db_replica_retry_seconds: float = 5.0
+    db_replica_sticky_seconds: float = 0.0
+
+    graphql_max_depth: int = 10
+    graphql_max_aliases: int = 30
+    graphql_max_cost: int = 5000
+    graphql_document_cache_size: int = 1000
+    graphql_persisted_query_cache_size: int = 1000
+
+    saga_workers: int = 4
+    saga_queue_size: int = 1000
+    saga_step_timeout: float = 10.0
+    saga_step_retries: int = 2
+    saga_lease_seconds: float = 30.0
+
+    # "memory" keeps events in the process; "sql" shares them through the database
+    # and is required when running several workers.
+    event_store_backend: str = "memory"
+    event_codec: str = "orjson"
+    event_store_poll_interval: float = 0.1
+
+    outbox_batch_size: int = 100
+    outbox_poll_interval: float = 0.1
+
+    events_subscriber_buffer_size: int = 1000
+    events_catchup_batch_size: int = 1000
+    events_keepalive_seconds: float = 15.0
+
+    # Admission control for the order API; 0 disables a check.
+    rate_limit_per_second: float = 0.0
+    rate_limit_burst: int = 20
+    rate_limit_key_header: str = ""
+    rate_limit_redis_url: str = ""
+    max_concurrent_requests: int = 100
+    max_queued_requests: int = 200
+    queue_timeout: float = 2.0
+    shed_loop_lag_seconds: float = 0.5
+    shed_pool_waiting: int = 50
+    shed_retry_after: float = 1.0
+    admission_paths: str = "/api/v1,/rest,/graphql"
+    admission_exempt_paths: str = "/api/v1/events"
+
+    # Idempotency-Key replay for order creation; Redis shares records across workers.
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_lock_seconds: float = 60.0
+    idempotency_max_keys: int = 100_000
+    idempotency_redis_url: str = ""
+
+    # Startup warmup and readiness probe.
+    warmup_pool_connections: int = 5
+    readiness_timeout: float = 2.0
+    readiness_min_pool_headroom: int = 1
+
+    # Per-(user_id, status) totals updated in the same transaction as each order write,
+    # so ungrouped-by-time aggregates read a few summary rows instead of the orders table.
+    order_summary_enabled: bool = False
+
+    # Lets shared caches store order reads but revalidate them with If-None-Match.
+    http_cache_control: str = "public, max-age=0, must-revalidate"
+
+    @property
+    def replica_urls(self) -> List[str]:
+        """Read replica URLs from the comma-separated DB_REPLICA_URLS."""
+        return [url.strip() for url in self.db_replica_urls.split(",") if url.strip()]
+
+    @property
+    def admission_path_prefixes(self) -> List[str]:
+        """Path prefixes under admission control, from ADMISSION_PATHS."""
+        return [path.strip() for path in self.admission_paths.split(",") if path.strip()]
+
+    @property
+    def admission_exempt_path_prefixes(self) -> List[str]:
+        """Path prefixes never rejected (long-lived streams), from ADMISSION_EXEMPT_PATHS."""
+        return [path.strip() for path in self.admission_exempt_paths.split(",") if path.strip()]
 
 
 settings = Settings()
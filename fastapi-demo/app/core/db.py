@@ -1,38 +1,286 @@
 import asyncio
-from contextlib import asynccontextmanager
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Sequence
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.ext.asyncio import async_scoped_session
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
 
 from app.core import settings
+from app.core.pool import InstrumentedAsyncQueuePool
+
+REPLICA_STRATEGIES = ("round_robin", "least_connections")
+
+# Set once the current request/task has written, so its later reads see the write.
+_wrote_to_primary: ContextVar[bool] = ContextVar("wrote_to_primary", default=False)
+
+# Clients whose last write time is remembered for DB_REPLICA_STICKY_SECONDS.
+STICKY_CLIENTS_MAX = 10_000
+
+
+class WriteTrackingSession(Session):
+    """Session noting in info["committed_write"] whether a commit persisted any change."""
+
+
+@event.listens_for(WriteTrackingSession, "after_flush")
+def _flushed(session: Session, flush_context: Any) -> None:
+    session.info["pending_write"] = True
+
+
+@event.listens_for(WriteTrackingSession, "do_orm_execute")
+def _executed(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["pending_write"] = True
+
+
+@event.listens_for(WriteTrackingSession, "after_commit")
+def _committed(session: Session) -> None:
+    if session.info.pop("pending_write", False):
+        session.info["committed_write"] = True
+
+
+@event.listens_for(WriteTrackingSession, "after_rollback")
+def _rolled_back(session: Session) -> None:
+    session.info.pop("pending_write", None)
 
 
 class DB:
-    def __init__(self, url: str, echo: bool = False) -> None:
-        self.async_engine = create_async_engine(url=url, echo=echo)
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        replica_urls: Sequence[str] = (),
+        replica_strategy: str = "round_robin",
+        replica_retry_seconds: float = 5.0,
+        replica_sticky_seconds: float = 0.0,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        prepared_statements: bool = True,
+    ) -> None:
+        if replica_strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Unknown replica strategy: {replica_strategy}")
+        pool_options: Dict[str, Any] = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+            "statement_cache_size": statement_cache_size,
+            "prepared_statements": prepared_statements,
+        }
+        self.async_engine = create_async_engine(
+            url=url, echo=echo, **self._engine_options(url=url, **pool_options)
+        )
+        self.replica_engines: List[AsyncEngine] = [
+            create_async_engine(
+                url=replica_url, echo=echo, **self._engine_options(url=replica_url, **pool_options)
+            )
+            for replica_url in replica_urls
+        ]
+        self.replica_strategy = replica_strategy
+        self.replica_retry_seconds = replica_retry_seconds
+        self.replica_sticky_seconds = replica_sticky_seconds
+        self._replica_down_until: Dict[int, float] = {}
+        self._replica_counter = itertools.count()
+        # Last write per client key, oldest first, for replica_sticky_seconds.
+        self._client_writes: "OrderedDict[str, float]" = OrderedDict()
         self.async_session_factory = async_sessionmaker(
             bind=self.async_engine,
+            sync_session_class=WriteTrackingSession,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
-    def get_scope_session(self) -> AsyncSession:
-        scope = async_scoped_session(
-            session_factory=self.async_session_factory,
-            scopefunc=asyncio.current_task,
-        )
-        return scope
+    @staticmethod
+    def _engine_options(
+        url: str,
+        pool_size: int,
+        max_overflow: int,
+        pool_timeout: float,
+        pool_recycle: int,
+        pool_pre_ping: bool,
+        statement_cache_size: int,
+        prepared_statements: bool,
+    ) -> Dict[str, Any]:
+        """Pool and driver options for create_async_engine."""
+        parsed_url = make_url(url)
+        if parsed_url.get_backend_name() == "sqlite" and parsed_url.database in (None, "", ":memory:"):
+            # In-memory SQLite lives in a single connection, so there is no pool to tune.
+            return {}
+
+        options: Dict[str, Any] = {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+        }
+        if parsed_url.get_driver_name() == "asyncpg":
+            if prepared_statements:
+                options["connect_args"] = {"statement_cache_size": statement_cache_size}
+            else:
+                # PgBouncer in transaction mode cannot keep named server-side statements.
+                options["connect_args"] = {
+                    "statement_cache_size": 0,
+                    "prepared_statement_cache_size": 0,
+                    "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+                }
+        return options
+
+    def ensure_sqlite_directory(self) -> None:
+        """Create the directory of a file-based SQLite database; nothing for other backends."""
+        url = self.async_engine.url
+        if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+            Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _engine_pool_status(engine: AsyncEngine) -> Dict[str, float]:
+        pool = engine.sync_engine.pool
+        if isinstance(pool, InstrumentedAsyncQueuePool):
+            return pool.snapshot()
+        return {}
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Snapshot of connection pool occupancy and checkout counters."""
+        return {
+            "primary": self._engine_pool_status(self.async_engine),
+            "replicas": [self._engine_pool_status(engine) for engine in self.replica_engines],
+        }
+
+    def _read_from_primary(self, client_key: str | None) -> bool:
+        if not self.replica_engines or _wrote_to_primary.get():
+            return True
+        last_write_at = self._client_writes.get(client_key) if client_key is not None else None
+        return last_write_at is not None and time.monotonic() - last_write_at < self.replica_sticky_seconds
+
+    def _record_write(self, client_key: str | None) -> None:
+        _wrote_to_primary.set(True)
+        if client_key is None or self.replica_sticky_seconds <= 0:
+            return
+        self._client_writes.pop(client_key, None)
+        self._client_writes[client_key] = time.monotonic()
+        while len(self._client_writes) > STICKY_CLIENTS_MAX:
+            self._client_writes.popitem(last=False)
+
+    def _replica_candidates(self) -> List[int]:
+        """Healthy replica indexes, in the order they should be tried."""
+        now = time.monotonic()
+        healthy = [
+            index for index in range(len(self.replica_engines))
+            if self._replica_down_until.get(index, 0.0) <= now
+        ]
+        if self.replica_strategy == "least_connections":
+            return sorted(
+                healthy,
+                key=lambda index: self._engine_pool_status(self.replica_engines[index]).get("checked_out", 0),
+            )
+        if not healthy:
+            return healthy
+        offset = next(self._replica_counter) % len(healthy)
+        return healthy[offset:] + healthy[:offset]
+
+    async def _connect_replica(self) -> AsyncConnection | None:
+        """Connect to a healthy replica, marking failed ones down for a while."""
+        for index in self._replica_candidates():
+            try:
+                return await self.replica_engines[index].connect()
+            except (OSError, exc.DBAPIError, exc.TimeoutError):
+                self._replica_down_until[index] = time.monotonic() + self.replica_retry_seconds
+        return None
 
     @asynccontextmanager
-    async def get_session(self):
-        session = self.get_scope_session()
+    async def get_session(
+        self, read_only: bool = False, client_key: str | None = None
+    ) -> AsyncIterator[AsyncSession]:
+        """Session on the primary, or on a replica for read-only work.
+
+        Read-only sessions fall back to the primary when no replica is reachable,
+        when the current request has already committed a write, or when client_key
+        committed one within replica_sticky_seconds.
+        """
+        if read_only and not self._read_from_primary(client_key):
+            connection = await self._connect_replica()
+            if connection is not None:
+                session = self.async_session_factory(bind=connection)
+                try:
+                    yield session
+                finally:
+                    await session.close()
+                    await connection.close()
+                return
+
+        session = self.async_session_factory()
         try:
             yield session
         finally:
-            await session.remove()
+            await session.close()
+            if session.info.pop("committed_write", False):
+                self._record_write(client_key)
+
+
+class RequestSessions:
+    """Sessions shared by everything that runs within one request.
+
+    At most one read-only and one read-write session are opened, lazily, and
+    all of them are closed together by close(). Once the write session exists,
+    reads reuse it so they see the request's own writes.
+    """
+
+    def __init__(self, db: DB, client_key: str | None = None) -> None:
+        self._db = db
+        self._client_key = client_key
+        self._stack = AsyncExitStack()
+        self._sessions: Dict[bool, AsyncSession] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, read_only: bool = False) -> AsyncSession:
+        """Return the request's session, opening it on first use."""
+        if read_only and False in self._sessions:
+            return self._sessions[False]
+        if read_only not in self._sessions:
+            self._sessions[read_only] = await self._stack.enter_async_context(
+                self._db.get_session(read_only=read_only, client_key=self._client_key)
+            )
+        return self._sessions[read_only]
+
+    @asynccontextmanager
+    async def acquire(self, read_only: bool = False) -> AsyncIterator[AsyncSession]:
+        """Exclusive use of the request's session for concurrently running resolvers."""
+        async with self._lock:
+            yield await self.get(read_only=read_only)
 
+    async def close(self) -> None:
+        await self._stack.aclose()
+        self._sessions.clear()
 
-factory = DB(url=settings.db_url, echo=settings.db_echo)
 
+factory = DB(
+    url=settings.db_url,
+    echo=settings.db_echo,
+    replica_urls=settings.replica_urls,
+    replica_strategy=settings.db_replica_strategy,
+    replica_retry_seconds=settings.db_replica_retry_seconds,
+    replica_sticky_seconds=settings.db_replica_sticky_seconds,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    statement_cache_size=settings.db_statement_cache_size,
+    prepared_statements=settings.db_prepared_statements,
+)
@@ -0,0 +1,117 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Sequence
+
+from sqlalchemy import Row
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install pyarrow
+    pa = None
+    pq = None
+
+CSV_MEDIA_TYPE = "text/csv"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+async def batched(rows: AsyncIterator[Row], size: int) -> AsyncIterator[List[Row]]:
+    """Group streamed rows into lists of at most size rows."""
+    batch: List[Row] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def csv_chunks(
+    rows: AsyncIterator[Row], columns: Sequence[str], batch_size: int
+) -> AsyncIterator[bytes]:
+    """CSV with a header line, one chunk per batch_size rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batched(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Nothing matched: only the header line.
+        yield buffer.getvalue().encode()
+
+
+def arrow_schema(columns: Sequence) -> "pa.Schema":
+    """Arrow schema of SQLAlchemy columns, from the Python type of each column."""
+    if pa is None:
+        raise ImportError("Parquet export requires the pyarrow package")
+    types = {str: pa.string(), float: pa.float64(), int: pa.int64(), bool: pa.bool_()}
+    fields = []
+    for column in columns:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            # Naive values from SQLite are UTC as well.
+            arrow_type = pa.timestamp("us", tz="UTC" if column.type.timezone else None)
+        else:
+            arrow_type = types[python_type]
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+
+class _ChunkSink:
+    """Write-only file that hands out what has been written since the last take()."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def writable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def parquet_chunks(
+    rows: AsyncIterator[Row], schema: "pa.Schema", batch_size: int
+) -> AsyncIterator[bytes]:
+    """A Parquet file written as it is read, one row group per batch_size rows.
+
+    Only the current record batch and its encoded row group are held in memory.
+    """
+    if pq is None:
+        raise ImportError("Parquet export requires the pyarrow package")
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        async for batch in batched(rows, batch_size):
+            columns = list(zip(*batch))
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,205 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Type
+
+from graphql import GraphQLError, GraphQLNamedType, GraphQLObjectType, GraphQLInterfaceType
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode
+from graphql import OperationDefinitionNode, SelectionSetNode, ValidationRule
+from graphql import get_named_type, get_nullable_type, is_list_type
+from strawberry.extensions import AddValidationRules
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.types import ExecutionResult
+
+
+class LRUCache:
+    """Small least-recently-used mapping with a fixed capacity."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[str, str] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class PersistedQueryNotFound(Exception):
+    """The client sent only a hash that is not in the persisted query cache."""
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter speaking the Automatic Persisted Queries (APQ) protocol.
+
+    Clients send `extensions.persistedQuery.sha256Hash`, with the query text only
+    the first time or after a PersistedQueryNotFound error. Known documents are
+    then looked up by hash, so the same query string reaches the parser and
+    validation caches on every request.
+    """
+
+    def __init__(self, *args: Any, persisted_query_cache_size: int = 1000, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.persisted_queries = LRUCache(maxsize=persisted_query_cache_size)
+
+    def should_render_graphql_ide(self, request) -> bool:
+        return (
+            super().should_render_graphql_ide(request)
+            and request.query_params.get("extensions") is None
+        )
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+            if isinstance(data.get("extensions"), str):
+                data["extensions"] = self.parse_json(data["extensions"])
+        elif "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        else:
+            return await super().parse_http_body(request)
+
+        return GraphQLRequestData(
+            query=self.resolve_query(data.get("query"), data.get("extensions")),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    def resolve_query(
+        self, query: Optional[str], extensions: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Return the query text, registering or looking it up by hash."""
+        persisted_query = (extensions or {}).get("persistedQuery")
+        if not persisted_query:
+            return query
+
+        query_hash = persisted_query.get("sha256Hash")
+        if query is None:
+            query = self.persisted_queries.get(query_hash)
+            if query is None:
+                raise PersistedQueryNotFound()
+            return query
+
+        if hashlib.sha256(query.encode()).hexdigest() != query_hash:
+            raise HTTPException(400, "provided sha does not match query")
+        self.persisted_queries.put(query_hash, query)
+        return query
+
+    async def execute_operation(self, request, context, root_value) -> ExecutionResult:
+        try:
+            return await super().execute_operation(
+                request=request, context=context, root_value=root_value
+            )
+        except PersistedQueryNotFound:
+            return ExecutionResult(
+                data=None,
+                errors=[
+                    GraphQLError(
+                        "PersistedQueryNotFound",
+                        extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                    )
+                ],
+            )
+
+
+def create_cost_validator(
+    max_cost: int, default_list_size: int, max_list_size: int
+) -> Type[ValidationRule]:
+    class QueryCostValidator(ValidationRule):
+        def enter_operation_definition(self, node: OperationDefinitionNode, *args: Any) -> None:
+            root_type = self.context.schema.get_root_type(node.operation)
+            if root_type is None:
+                return
+            cost = self.selection_set_cost(root_type, node.selection_set, set())
+            if cost > max_cost:
+                name = node.name.value if node.name else "anonymous"
+                self.report_error(
+                    GraphQLError(
+                        f"'{name}' exceeds maximum operation cost of {max_cost} (cost {cost})",
+                        [node],
+                    )
+                )
+
+        def selection_set_cost(
+            self,
+            parent_type: GraphQLNamedType,
+            selection_set: SelectionSetNode,
+            fragments: Set[str],
+        ) -> int:
+            cost = 0
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    cost += self.field_cost(parent_type, selection, fragments)
+                elif isinstance(selection, InlineFragmentNode):
+                    fragment_type = (
+                        self.context.schema.get_type(selection.type_condition.name.value)
+                        if selection.type_condition
+                        else parent_type
+                    )
+                    if fragment_type is not None:
+                        cost += self.selection_set_cost(fragment_type, selection.selection_set, fragments)
+                elif isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.context.get_fragment(name)
+                    if fragment is None or name in fragments:
+                        continue
+                    fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+                    if fragment_type is not None:
+                        cost += self.selection_set_cost(
+                            fragment_type, fragment.selection_set, fragments | {name}
+                        )
+            return cost
+
+        def field_cost(
+            self, parent_type: GraphQLNamedType, node: FieldNode, fragments: Set[str]
+        ) -> int:
+            if node.name.value.startswith("__") or not isinstance(
+                parent_type, (GraphQLObjectType, GraphQLInterfaceType)
+            ):
+                return 0
+            field = parent_type.fields.get(node.name.value)
+            if field is None:
+                return 0
+            if node.selection_set is None:
+                return 1
+
+            children = self.selection_set_cost(get_named_type(field.type), node.selection_set, fragments)
+            return 1 + children * self.list_size(field.type, node)
+
+        @staticmethod
+        def list_size(field_type: Any, node: FieldNode) -> int:
+            if not is_list_type(get_nullable_type(field_type)):
+                return 1
+            for argument in node.arguments:
+                if argument.name.value in ("first", "limit"):
+                    if isinstance(argument.value, IntValueNode):
+                        # Clamped so that a zero or negative literal cannot offset other fields.
+                        return min(max(int(argument.value.value), 1), max_list_size)
+                    # Variables are not known during validation; assume the worst case.
+                    return max_list_size
+            return default_list_size
+
+    return QueryCostValidator
+
+
+class QueryCostLimiter(AddValidationRules):
+    """Reject operations whose estimated cost exceeds max_cost before execution.
+
+    Every field costs 1; the selections below a list field are multiplied by its
+    `first`/`limit` argument, or by default_list_size when none is given.
+    """
+
+    def __init__(self, max_cost: int, default_list_size: int, max_list_size: int) -> None:
+        super().__init__([create_cost_validator(max_cost, default_list_size, max_list_size)])
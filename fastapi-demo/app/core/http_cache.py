@@ -0,0 +1,36 @@
+import hashlib
+from typing import Dict
+
+from fastapi import status
+from fastapi.responses import Response
+
+from app.core import settings
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag built from the values that identify one representation."""
+    digest = hashlib.blake2b(
+        "\x1f".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": settings.http_cache_control}
+
+
+def not_modified(etag: str) -> Response:
+    """Bodyless 304 carrying the same validators a 200 would."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
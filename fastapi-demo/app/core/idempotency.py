@@ -0,0 +1,243 @@
+import base64
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # optional: pip install redis
+    aioredis = None
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+@dataclass
+class IdempotencyRecord:
+    """The response given to the first request with an Idempotency-Key."""
+
+    fingerprint: str
+    # 0 while the first request is still being handled.
+    status_code: int = 0
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code != 0
+
+
+class IdempotencyStore(ABC):
+    """TTL store of idempotency records.
+
+    begin() atomically claims a key for a new request, or returns the record
+    already stored under it; the claim ends with complete() or abandon().
+    """
+
+    def __init__(self, ttl: float, lock_ttl: float) -> None:
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    @abstractmethod
+    async def begin(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        ...
+
+    @abstractmethod
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        ...
+
+    @abstractmethod
+    async def abandon(self, key: str) -> None:
+        ...
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Records of this process, oldest evicted first beyond max_keys."""
+
+    def __init__(self, ttl: float, lock_ttl: float, max_keys: int = 100_000) -> None:
+        super().__init__(ttl, lock_ttl)
+        self.max_keys = max_keys
+        self._records: "OrderedDict[str, Tuple[float, IdempotencyRecord]]" = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[IdempotencyRecord]:
+        entry = self._records.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= now:
+            del self._records[key]
+            return None
+        return record
+
+    def _put(self, key: str, record: IdempotencyRecord, expires_at: float) -> None:
+        self._records.pop(key, None)
+        self._records[key] = (expires_at, record)
+        while len(self._records) > self.max_keys:
+            self._records.popitem(last=False)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        now = time.monotonic()
+        record = self._get(key, now)
+        if record is None:
+            self._put(key, IdempotencyRecord(fingerprint), now + self.lock_ttl)
+        return record
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        self._put(key, record, time.monotonic() + self.ttl)
+
+    async def abandon(self, key: str) -> None:
+        self._records.pop(key, None)
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Records shared by all workers through Redis, expired by Redis itself."""
+
+    def __init__(self, url: str, ttl: float, lock_ttl: float, prefix: str = "idempotency:") -> None:
+        if aioredis is None:
+            raise ImportError("The Redis idempotency store requires the redis package")
+        super().__init__(ttl, lock_ttl)
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+
+    @staticmethod
+    def _dumps(record: IdempotencyRecord) -> bytes:
+        data = asdict(record)
+        data["body"] = base64.b64encode(record.body).decode()
+        return orjson.dumps(data)
+
+    @staticmethod
+    def _loads(payload: bytes) -> IdempotencyRecord:
+        data = orjson.loads(payload)
+        return IdempotencyRecord(
+            fingerprint=data["fingerprint"],
+            status_code=data["status_code"],
+            headers=[tuple(header) for header in data["headers"]],
+            body=base64.b64decode(data["body"]),
+        )
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        claim = self._dumps(IdempotencyRecord(fingerprint))
+        if await self._redis.set(self.prefix + key, claim, nx=True, px=int(self.lock_ttl * 1000)):
+            return None
+        payload = await self._redis.get(self.prefix + key)
+        # Expired between the two calls: treat it as claimed by someone else, retry later.
+        return self._loads(payload) if payload is not None else IdempotencyRecord(fingerprint)
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        await self._redis.set(self.prefix + key, self._dumps(record), px=int(self.ttl * 1000))
+
+    async def abandon(self, key: str) -> None:
+        await self._redis.delete(self.prefix + key)
+
+
+def _error(status_code: int, detail: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response of requests retried with the same Idempotency-Key.
+
+    Only the given (method, path) routes are covered. A replay never reaches
+    the application. A key reused with a different body is rejected with 422,
+    and a retry arriving while the first request still runs gets 409.
+    Responses with 5xx or 429 are not stored, so those can be retried.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        get_store: Callable[[], IdempotencyStore],
+        routes: Sequence[Tuple[str, str]],
+        header: str = "Idempotency-Key",
+    ) -> None:
+        self.app = app
+        self.get_store = get_store
+        self.routes = set(routes)
+        self.header = header.lower().encode()
+
+    def _key(self, scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return value.decode("latin-1")
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        key = self._key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            await _error(400, "Invalid Idempotency-Key")(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.blake2b(body, digest_size=16).hexdigest()
+        store_key = f"{scope['method']} {scope['path']} {key}"
+
+        store = self.get_store()
+        stored = await store.begin(store_key, fingerprint)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                response = _error(422, "Idempotency-Key was used for a different request")
+            elif not stored.completed:
+                response = _error(409, "A request with this Idempotency-Key is in progress", {"Retry-After": "1"})
+            else:
+                await send({
+                    "type": "http.response.start",
+                    "status": stored.status_code,
+                    "headers": [
+                        (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers
+                    ] + [(b"idempotent-replayed", b"true")],
+                })
+                await send({"type": "http.response.body", "body": stored.body})
+                return
+            await response(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        record = IdempotencyRecord(fingerprint)
+        response_body: List[bytes] = []
+
+        async def send_and_record(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record.status_code = message["status"]
+                record.headers = [
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message["headers"]
+                ]
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_record)
+        except BaseException:
+            await store.abandon(store_key)
+            raise
+        if record.completed and record.status_code < 500 and record.status_code != 429:
+            record.body = b"".join(response_body)
+            await store.complete(store_key, record)
+        else:
+            await store.abandon(store_key)
@@ -0,0 +1,222 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Pool snapshot fields that only ever grow; the others are point-in-time gauges.
+POOL_COUNTERS = ("checkouts", "timeouts", "wait_seconds_total")
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self, kind: str = "counter") -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {kind}"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def render(self, kind: str = "gauge") -> List[str]:
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[index] += 1
+        values[-2] += 1
+        values[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, values in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (repr(float(bound)),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} {values[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {values[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-1]}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total", "HTTP responses by route and status code.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being processed.", ("method",),
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request, by route.",
+    QUERY_COUNT_BUCKETS, ("method", "route"),
+)
+DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request, by route.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+
+
+class RequestStats:
+    """SQL statements executed on behalf of the current request."""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _request_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _request_stats.get()
+    started_at = conn.info.get("query_started_at")
+    if stats is not None and started_at:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started_at.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    started_at = connection.info.get("query_started_at") if connection is not None else None
+    if started_at:
+        started_at.pop()
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+        f"app;dur={elapsed * 1000:.2f}"
+    )
+
+
+class MetricsMiddleware:
+    """Record latency, status code and SQL statements of every HTTP request.
+
+    Routes are labelled by their path template (unmatched paths share one
+    label), and responses get a Server-Timing header with the DB time and
+    query count up to the moment the response started.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method: str = scope["method"]
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats, time.perf_counter() - start))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec((method,))
+            route = scope.get("route")
+            labels = (method, route.path if route is not None else "unmatched")
+            REQUEST_LATENCY.observe(labels, elapsed)
+            REQUESTS_TOTAL.inc(labels + (str(status_code),))
+            DB_QUERIES.observe(labels, stats.queries)
+            DB_SECONDS.observe(labels, stats.db_seconds)
+            _request_stats.reset(token)
+
+
+def _pool_lines(pool_status: Dict[str, Any]) -> List[str]:
+    engines: List[Tuple[str, Dict[str, float]]] = [("primary", pool_status.get("primary", {}))]
+    engines += [(f"replica-{i}", pool) for i, pool in enumerate(pool_status.get("replicas", []))]
+    lines: List[str] = []
+    for field in sorted({field for _, pool in engines for field in pool}):
+        name = f"db_pool_{field}"
+        kind = "counter" if field in POOL_COUNTERS else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        for engine, pool in engines:
+            if field in pool:
+                lines.append(f'{name}{{engine="{engine}"}} {float(pool[field])}')
+    return lines
+
+
+def render_metrics(pool_status: Dict[str, Any]) -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in (REQUEST_LATENCY, REQUESTS_TOTAL, REQUESTS_IN_FLIGHT, DB_QUERIES, DB_SECONDS):
+        lines.extend(metric.render())
+    lines.extend(_pool_lines(pool_status))
+    return "\n".join(lines) + "\n"
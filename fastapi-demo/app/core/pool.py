@@ -0,0 +1,64 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool.base import PoolProxiedConnection
+
+
+class PoolMetrics:
+    """Cumulative checkout counters for one connection pool."""
+
+    def __init__(self) -> None:
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.wait_seconds_total: float = 0.0
+        self.wait_seconds_max: float = 0.0
+        self.waiting: int = 0
+
+    def record_checkout(self, wait: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait
+        if wait > self.wait_seconds_max:
+            self.wait_seconds_max = wait
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time and timeouts."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics: PoolMetrics = PoolMetrics()
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        self.metrics.waiting += 1
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.waiting -= 1
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current pool occupancy plus cumulative checkout counters."""
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "waiting": self.metrics.waiting,
+            "checkouts": self.metrics.checkouts,
+            "timeouts": self.metrics.timeouts,
+            "wait_seconds_total": self.metrics.wait_seconds_total,
+            "wait_seconds_max": self.metrics.wait_seconds_max,
+        }
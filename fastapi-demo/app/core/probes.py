@@ -0,0 +1,87 @@
+import asyncio
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import urls
+from app.core.db import DB, RequestSessions
+from app.order.GraphQL import WARMUP_OPERATIONS
+from app.order.services import OrderService
+from app.services.event_store import EventStore
+
+DB_ERRORS = (OSError, exc.DBAPIError, exc.TimeoutError, asyncio.TimeoutError)
+
+
+async def _prewarm_engine(engine: AsyncEngine, connections: int) -> None:
+    """Open connections at once so the pool keeps them for the first requests."""
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)))
+    try:
+        for connection in opened:
+            await connection.execute(text("SELECT 1"))
+    finally:
+        await asyncio.gather(*(connection.close() for connection in opened))
+
+
+async def warm_up(db: DB, pool_connections: int) -> None:
+    """Startup warmup: fill the pools, then run the hot SQL and GraphQL reads once."""
+    if pool_connections > 0:
+        await asyncio.gather(*(
+            _prewarm_engine(engine, pool_connections)
+            for engine in (db.async_engine, *db.replica_engines)
+        ))
+
+    sessions = RequestSessions(db)
+    try:
+        await OrderService.warm_up(session=await sessions.get(read_only=True))
+        for query, variables in WARMUP_OPERATIONS:
+            context = await urls.get_context(sessions=sessions)
+            await urls.schema.execute(query, variable_values=variables, context_value=context)
+    finally:
+        await sessions.close()
+
+
+async def _ping(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_readiness(
+    db: DB,
+    event_store: EventStore,
+    warmed_up: bool,
+    timeout: float = 2.0,
+    min_pool_headroom: int = 1,
+) -> Tuple[bool, Dict[str, Any]]:
+    """Whether this instance should receive traffic, with the result of every check."""
+    checks: Dict[str, Dict[str, Any]] = {
+        "warmup": {"ok": warmed_up},
+        "event_store": {"ok": event_store.ready},
+    }
+
+    pool = db.pool_status()["primary"]
+    if pool and (pool["pool_size"] <= 0 or pool["max_overflow"] < 0):
+        # pool_size=0 or max_overflow=-1: the pool opens connections without limit.
+        checks["pool"] = {"ok": True, "headroom": None, "waiting": pool["waiting"]}
+    elif pool:
+        headroom = pool["pool_size"] + pool["max_overflow"] - pool["checked_out"]
+        checks["pool"] = {
+            "ok": headroom >= min_pool_headroom,
+            "headroom": headroom,
+            "waiting": pool["waiting"],
+        }
+    else:
+        # NullPool, StaticPool and the like have no size to exhaust.
+        checks["pool"] = {"ok": True}
+
+    if checks["pool"]["ok"]:
+        try:
+            await asyncio.wait_for(_ping(db.async_engine), timeout)
+            checks["database"] = {"ok": True}
+        except DB_ERRORS as error:
+            checks["database"] = {"ok": False, "error": type(error).__name__}
+    else:
+        # Pinging would only queue behind the requests holding the connections.
+        checks["database"] = {"ok": False, "error": "pool exhausted"}
+
+    return all(check["ok"] for check in checks.values()), checks
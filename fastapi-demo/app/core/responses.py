@@ -0,0 +1,32 @@
+from typing import Any, Sequence
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import Row
+
+
+class RowsJSONResponse(Response):
+    """JSON array of SQL rows serialized straight from the row tuples with orjson.
+
+    Skips building pydantic models and response_model validation for list reads.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Sequence[Row]) -> bytes:
+        return orjson.dumps([row._asdict() for row in content])
+
+
+def ndjson_line(row: Row) -> bytes:
+    """One row as a newline-terminated JSON document."""
+    return orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE)
+
+
+SSE_KEEPALIVE = b": keep-alive\n\n"
+
+
+def sse_message(data: Any, event_id: int | str, event: str) -> bytes:
+    """One Server-Sent Events message with a JSON data line."""
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        str(event_id).encode(), event.encode(), orjson.dumps(data)
+    )
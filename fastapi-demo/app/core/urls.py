@@ -1,10 +1,16 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
 from strawberry.tools import merge_types
 from strawberry import Schema
-from strawberry.fastapi import GraphQLRouter
+from strawberry.extensions import MaxAliasesLimiter, ParserCache
+from strawberry.extensions import QueryDepthLimiter, ValidationCache
 
+from .config import settings
+from .graphql_extensions import PersistedQueryRouter, QueryCostLimiter
+from ..dependencies import get_request_sessions
 from ..order import REST as orderREST
 from ..order import GraphQL as orderGraphQL
+from ..order.schemas import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 
 class MainRouter:
@@ -24,12 +30,37 @@ main_router = MainRouter(rest=rest, graphql=graphql)
 
 Query = merge_types("Query", (orderGraphQL.Query,))
 Mutation = merge_types("Mutation", (orderGraphQL.Mutation,))
-schema = Schema(query=Query, mutation=Mutation)
+schema = Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        QueryDepthLimiter(max_depth=settings.graphql_max_depth),
+        MaxAliasesLimiter(max_alias_count=settings.graphql_max_aliases),
+        QueryCostLimiter(
+            max_cost=settings.graphql_max_cost,
+            default_list_size=PAGE_SIZE_DEFAULT,
+            max_list_size=PAGE_SIZE_MAX,
+        ),
+        ParserCache(maxsize=settings.graphql_document_cache_size),
+        ValidationCache(maxsize=settings.graphql_document_cache_size),
+    ],
+)
+
+
+async def get_context(sessions=Depends(get_request_sessions)) -> Dict[str, Any]:
+    """GraphQL context: DB sessions and DataLoaders shared by all resolvers of one operation."""
+    return {
+        "sessions": sessions,
+        "order_loaders": orderGraphQL.OrderLoaders(sessions),
+    }
+
 
-graphql_app = GraphQLRouter(
+graphql_app = PersistedQueryRouter(
     schema=schema,
     path="/graphql",
-    graphql_ide="graphiql"
+    graphql_ide="graphiql",
+    context_getter=get_context,
+    persisted_query_cache_size=settings.graphql_persisted_query_cache_size,
 )
 
 
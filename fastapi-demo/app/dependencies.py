@@ -1,17 +1,49 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import db
+from app.core.db import RequestSessions
 from app.services.event_store import EventStore
+from app.services.sql_event_store import SqlEventStore
+from app.services.codecs import get_codec
 from app.services.command_handler import CommandHandler
 from app.services.query_handler import QueryHandler
+from app.services.outbox import InProcessBroker, OutboxRelay
+from app.services.broadcaster import EventBroadcaster
+from app.core.idempotency import IdempotencyStore, InMemoryIdempotencyStore, RedisIdempotencyStore
+from app.core.admission import (
+    AdmissionController,
+    ConcurrencyLimiter,
+    InMemoryRateLimiter,
+    LoopLagMonitor,
+    RateLimiter,
+    RedisRateLimiter,
+)
+from app.core import settings
 
 _event_store: Optional[EventStore] = None
 _command_handler: Optional[CommandHandler] = None
 _query_handler: Optional[QueryHandler] = None
+_broker: Optional[InProcessBroker] = None
+_outbox_relay: Optional[OutboxRelay] = None
+_broadcaster: Optional[EventBroadcaster] = None
+_admission_controller: Optional[AdmissionController] = None
+_idempotency_store: Optional[IdempotencyStore] = None
 
 def get_event_store() -> EventStore:
     """Get singleton EventStore instance."""
     global _event_store
     if _event_store is None:
-        _event_store = EventStore()
+        if settings.event_store_backend == "sql":
+            _event_store = SqlEventStore(
+                get_codec(settings.event_codec),
+                poll_interval=settings.event_store_poll_interval,
+            )
+        elif settings.event_store_backend == "memory":
+            _event_store = EventStore()
+        else:
+            raise ValueError(f"Unknown event store backend: {settings.event_store_backend}")
+        _event_store.add_listener(get_broadcaster().publish)
     return _event_store
 
 def get_command_handler() -> CommandHandler:
@@ -28,3 +60,116 @@ def get_query_handler() -> QueryHandler:
         _query_handler = QueryHandler(get_event_store())
     return _query_handler
 
+def get_broadcaster() -> EventBroadcaster:
+    """Get singleton EventBroadcaster instance."""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = EventBroadcaster(buffer_size=settings.events_subscriber_buffer_size)
+    return _broadcaster
+
+def get_broker() -> InProcessBroker:
+    """Get singleton message broker instance."""
+    global _broker
+    if _broker is None:
+        _broker = InProcessBroker()
+    return _broker
+
+def get_outbox_relay() -> OutboxRelay:
+    """Get singleton OutboxRelay instance."""
+    global _outbox_relay
+    if _outbox_relay is None:
+        _outbox_relay = OutboxRelay(
+            get_event_store(),
+            get_broker(),
+            batch_size=settings.outbox_batch_size,
+            poll_interval=settings.outbox_poll_interval,
+        )
+    return _outbox_relay
+
+def get_admission_controller() -> AdmissionController:
+    """Get singleton AdmissionController instance built from the settings."""
+    global _admission_controller
+    if _admission_controller is None:
+        rate_limiter: Optional[RateLimiter] = None
+        if settings.rate_limit_per_second > 0:
+            if settings.rate_limit_redis_url:
+                rate_limiter = RedisRateLimiter(
+                    settings.rate_limit_redis_url,
+                    rate=settings.rate_limit_per_second,
+                    burst=settings.rate_limit_burst,
+                )
+            else:
+                rate_limiter = InMemoryRateLimiter(
+                    rate=settings.rate_limit_per_second,
+                    burst=settings.rate_limit_burst,
+                )
+        concurrency: Optional[ConcurrencyLimiter] = None
+        if settings.max_concurrent_requests > 0:
+            concurrency = ConcurrencyLimiter(
+                limit=settings.max_concurrent_requests,
+                max_queued=settings.max_queued_requests,
+                queue_timeout=settings.queue_timeout,
+            )
+        _admission_controller = AdmissionController(
+            rate_limiter=rate_limiter,
+            concurrency=concurrency,
+            loop_monitor=LoopLagMonitor(),
+            max_loop_lag=settings.shed_loop_lag_seconds,
+            pool_status=lambda: db.factory.pool_status(),
+            max_pool_waiting=settings.shed_pool_waiting,
+            retry_after=settings.shed_retry_after,
+        )
+    return _admission_controller
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get singleton IdempotencyStore instance, shared through Redis if configured."""
+    global _idempotency_store
+    if _idempotency_store is None:
+        if settings.idempotency_redis_url:
+            _idempotency_store = RedisIdempotencyStore(
+                settings.idempotency_redis_url,
+                ttl=settings.idempotency_ttl_seconds,
+                lock_ttl=settings.idempotency_lock_seconds,
+            )
+        else:
+            _idempotency_store = InMemoryIdempotencyStore(
+                ttl=settings.idempotency_ttl_seconds,
+                lock_ttl=settings.idempotency_lock_seconds,
+                max_keys=settings.idempotency_max_keys,
+            )
+    return _idempotency_store
+
+
+def get_client_key(request: Request) -> str | None:
+    """Identity of the caller, as for rate limiting: RATE_LIMIT_KEY_HEADER or the client address."""
+    if settings.rate_limit_key_header:
+        key = request.headers.get(settings.rate_limit_key_header)
+        if key:
+            return key
+    return request.client.host if request.client else None
+
+
+async def get_request_sessions(
+    client_key: str | None = Depends(get_client_key),
+) -> AsyncIterator[RequestSessions]:
+    """Get DB sessions shared by the whole request, closed when it finishes.
+
+    Reads stay on the primary for DB_REPLICA_STICKY_SECONDS after the same client wrote.
+    """
+    sessions = RequestSessions(db.factory, client_key=client_key)
+    try:
+        yield sessions
+    finally:
+        await sessions.close()
+
+async def get_read_session(
+    sessions: RequestSessions = Depends(get_request_sessions),
+) -> AsyncSession:
+    """Get the request's read-only session."""
+    return await sessions.get(read_only=True)
+
+async def get_write_session(
+    sessions: RequestSessions = Depends(get_request_sessions),
+) -> AsyncSession:
+    """Get the request's read-write session."""
+    return await sessions.get()
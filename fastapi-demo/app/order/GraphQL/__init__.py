@@ -1,3 +1,4 @@
-from .query import Query
+from .query import Query, WARMUP_OPERATIONS
 from .mutation import Mutation
 
+from .loaders import OrderLoaders
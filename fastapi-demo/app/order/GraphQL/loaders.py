@@ -0,0 +1,25 @@
+from typing import List, Sequence
+from sqlalchemy import Row
+from strawberry.dataloader import DataLoader
+
+from ...core.db import RequestSessions
+from ..services import OrderService
+
+
+class OrderLoaders:
+    """Per-request DataLoaders batching order lookups into one query each."""
+
+    def __init__(self, sessions: RequestSessions) -> None:
+        self.sessions = sessions
+        self.by_id: DataLoader[str, Row | None] = DataLoader(load_fn=self._load_by_id)
+        self.by_user_id: DataLoader[str, List[Row]] = DataLoader(
+            load_fn=self._load_by_user_id
+        )
+
+    async def _load_by_id(self, order_ids: Sequence[str]) -> List[Row | None]:
+        async with self.sessions.acquire(read_only=True) as session:
+            return await OrderService.get_many_by_id(session=session, order_ids=order_ids)
+
+    async def _load_by_user_id(self, user_ids: Sequence[str]) -> List[List[Row]]:
+        async with self.sessions.acquire(read_only=True) as session:
+            return await OrderService.get_many_by_user_id(session=session, user_ids=user_ids)
@@ -1,7 +1,8 @@
+from typing import List
 import strawberry
 
-from ...core import factory
 from ..schemas import OrderOutputGraphQL, OrderCreateInputGraphQL, OrderUpdateInputGraphQL
+from ..schemas import OrderBulkResultGraphQL, OrderBulkResult, BULK_SIZE_MAX
 from ..services import OrderService
 from ..schemas import OrderCreateInput, OrderUpdateInput, OrderOutput
 
@@ -11,9 +12,9 @@ class Mutation:
     """GraphQL mutation operations for orders."""
 
     @strawberry.field
-    async def create_order(order: OrderCreateInputGraphQL) -> OrderOutputGraphQL:
+    async def create_order(info: strawberry.Info, order: OrderCreateInputGraphQL) -> OrderOutputGraphQL:
         """Create new order."""
-        async with factory.get_session() as session:
+        async with info.context["sessions"].acquire() as session:
             order_input: OrderCreateInput = OrderCreateInput(
                 order_id=order.order_id,
                 user_id=order.user_id,
@@ -24,15 +25,52 @@ class Mutation:
                 order_id=result.order_id,
                 user_id=result.user_id,
                 amount=result.amount,
-                status=result.status
+                status=result.status,
+                version=result.version,
             )
 
+    @strawberry.field
+    async def create_orders(
+        info: strawberry.Info,
+        orders: List[OrderCreateInputGraphQL],
+    ) -> List[OrderBulkResultGraphQL]:
+        """Create orders in bulk."""
+        if len(orders) > BULK_SIZE_MAX:
+            raise ValueError(f"At most {BULK_SIZE_MAX} orders per request!")
+        async with info.context["sessions"].acquire() as session:
+            orders_input: List[OrderCreateInput] = [
+                OrderCreateInput(
+                    order_id=order.order_id,
+                    user_id=order.user_id,
+                    amount=order.amount
+                )
+                for order in orders
+            ]
+            results: List[OrderBulkResult] = await OrderService.create_many(
+                session=session, orders_create=orders_input
+            )
+            return [
+                OrderBulkResultGraphQL(
+                    order_id=r.order_id,
+                    success=r.success,
+                    order=OrderOutputGraphQL(
+                        order_id=r.order.order_id,
+                        user_id=r.order.user_id,
+                        amount=r.order.amount,
+                        status=r.order.status,
+                        version=r.order.version,
+                    ) if r.order else None,
+                    error=r.error,
+                )
+                for r in results
+            ]
+
     @strawberry.field
     async def update_order(
-        order_id: str, order_update: OrderUpdateInputGraphQL
+        info: strawberry.Info, order_id: str, order_update: OrderUpdateInputGraphQL
     ) -> OrderOutputGraphQL:
         """Update order."""
-        async with factory.get_session() as session:
+        async with info.context["sessions"].acquire() as session:
             update_input: OrderUpdateInput = OrderUpdateInput(status=order_update.status)
             result: OrderOutput = await OrderService.update(
                 session=session, order_id=order_id, order_update=update_input
@@ -41,12 +79,13 @@ class Mutation:
                 order_id=result.order_id,
                 user_id=result.user_id,
                 amount=result.amount,
-                status=result.status
+                status=result.status,
+                version=result.version,
             )
 
     @strawberry.field
-    async def delete_order(order_id: str) -> None:
+    async def delete_order(info: strawberry.Info, order_id: str) -> None:
         """Delete order."""
-        async with factory.get_session() as session:
+        async with info.context["sessions"].acquire() as session:
             await OrderService.delete(session=session, order_id=order_id)
 
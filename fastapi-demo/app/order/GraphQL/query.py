@@ -1,9 +1,28 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 import strawberry
+from fastapi import HTTPException
+from fastapi import status
+from sqlalchemy import Row
 
 from ..services import OrderService
-from ...core import factory
-from ..schemas import OrderOutputGraphQL, OrderOutput
+from ..schemas import OrderOutputGraphQL, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from ..schemas import OrderAggregateDimension, OrderAggregateGraphQL, TimeBucket
+
+# Representative read operations run once at startup, so that the first real
+# requests do not pay for cold parsing, validation and SQL compilation.
+WARMUP_OPERATIONS = (
+    (
+        "query GetOrdersByUserId($userId: String!) "
+        "{ getOrdersByUserId(userId: $userId) { orderId userId amount status version } }",
+        {"userId": "__warmup__"},
+    ),
+    (
+        "query GetAllOrders($after: String) "
+        "{ getAllOrders(after: $after, first: 1) { orderId userId amount status version } }",
+        {"after": "__warmup__"},
+    ),
+)
 
 
 @strawberry.type
@@ -11,44 +30,52 @@ class Query:
     """GraphQL query operations for orders."""
 
     @strawberry.field
-    async def get_all_orders() -> List[OrderOutputGraphQL]:
-        """Get all orders."""
-        async with factory.get_session() as session:
-            orders: List[OrderOutput] = await OrderService.get_all(session=session)
-            return [
-                OrderOutputGraphQL(
-                    order_id=o.order_id,
-                    user_id=o.user_id,
-                    amount=o.amount,
-                    status=o.status
-                )
-                for o in orders
-            ]
+    async def get_all_orders(
+        info: strawberry.Info, after: Optional[str] = None, first: int = PAGE_SIZE_DEFAULT
+    ) -> List[OrderOutputGraphQL]:
+        """Get a page of orders after the given order_id cursor."""
+        async with info.context["sessions"].acquire(read_only=True) as session:
+            # Rows expose the OrderOutputGraphQL fields as attributes, so they are returned as is.
+            return await OrderService.get_all(
+                session=session, after=after, limit=min(max(first, 1), PAGE_SIZE_MAX)
+            )
 
     @strawberry.field
-    async def get_order_by_id(order_id: str) -> OrderOutputGraphQL:
+    async def get_order_by_id(info: strawberry.Info, order_id: str) -> OrderOutputGraphQL:
         """Get order by ID."""
-        async with factory.get_session() as session:
-            order: OrderOutput = await OrderService.get_by_id(session=session, order_id=order_id)
-            return OrderOutputGraphQL(
-                order_id=order.order_id,
-                user_id=order.user_id,
-                amount=order.amount,
-                status=order.status
+        order: Row | None = await info.context["order_loaders"].by_id.load(order_id)
+        if order is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Order {order_id} not found!",
             )
+        return order
 
     @strawberry.field
-    async def get_orders_by_user_id(user_id: str) -> List[OrderOutputGraphQL]:
+    async def get_orders_by_user_id(info: strawberry.Info, user_id: str) -> List[OrderOutputGraphQL]:
         """Get orders by user ID."""
-        async with factory.get_session() as session:
-            orders: List[OrderOutput] = await OrderService.get_by_user_id(session=session, user_id=user_id)
-            return [
-                OrderOutputGraphQL(
-                    order_id=o.order_id,
-                    user_id=o.user_id,
-                    amount=o.amount,
-                    status=o.status
-                )
-                for o in orders
-            ]
+        return await info.context["order_loaders"].by_user_id.load(user_id)
+
 
+    @strawberry.field
+    async def order_aggregates(
+        info: strawberry.Info,
+        group_by: Optional[List[OrderAggregateDimension]] = None,
+        bucket: Optional[TimeBucket] = None,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> List[OrderAggregateGraphQL]:
+        """Order count and total amount grouped by user_id, status and/or a created_at time bucket."""
+        async with info.context["sessions"].acquire(read_only=True) as session:
+            results = await OrderService.aggregate(
+                session=session,
+                group_by=group_by or (),
+                bucket=bucket,
+                user_id=user_id,
+                status=status,
+                created_after=created_after,
+                created_before=created_before,
+            )
+        return [OrderAggregateGraphQL(**result.model_dump()) for result in results]
@@ -1,51 +1,193 @@
-from typing import List
-from fastapi import APIRouter, status
+from datetime import datetime
+from typing import AsyncIterator, List, Literal, Sequence
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...core import factory
+from ...core import export, factory
+from ...core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from ...core.responses import RowsJSONResponse, ndjson_line
+from ...core.db import RequestSessions
+from ...dependencies import get_read_session, get_request_sessions, get_write_session
 from ..schemas import OrderOutput, OrderCreateInput, OrderUpdateInput
+from ..schemas import OrderBulkUpdateInput, OrderBulkResult
+from ..schemas import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, BULK_SIZE_MAX
+from ..schemas import EXPORT_BATCH_SIZE_DEFAULT, EXPORT_BATCH_SIZE_MAX
+from ..schemas import OrderAggregateDimension, OrderAggregateOutput, TimeBucket
 from ..services import OrderService
 
 router = APIRouter(prefix="/orders")
 
 
+async def _stream_ndjson() -> AsyncIterator[bytes]:
+    # The stream outlives the endpoint call, so it keeps its own session.
+    async with factory.get_session(read_only=True) as session:
+        async for row in OrderService.stream_all(session=session):
+            yield ndjson_line(row)
+
+
+async def _stream_export(
+    format: Literal["csv", "parquet"], user_id: str | None, order_status: str | None, batch_size: int
+) -> AsyncIterator[bytes]:
+    async with factory.get_session(read_only=True) as session:
+        async for chunk in OrderService.export(
+            session=session, format=format, user_id=user_id, status=order_status, batch_size=batch_size
+        ):
+            yield chunk
+
+
+def _order_tag(order: Row | OrderOutput) -> str:
+    # Every field of the representation: version alone restarts at 1 when an
+    # order is deleted and created again under the same order_id.
+    return f"{order.order_id}:{order.user_id}:{order.amount!r}:{order.status}:{order.version}"
+
+
+def _user_orders_etag(user_id: str, rows: Sequence[Row]) -> str:
+    return make_etag(user_id, *(_order_tag(row) for row in rows))
+
+
 @router.get("/all", response_model=List[OrderOutput], status_code=status.HTTP_200_OK)
-async def get_all() -> List[OrderOutput]:
-    """Get all orders."""
-    async with factory.get_session() as session:
-        return await OrderService.get_all(session=session)
+async def get_all(
+    after: str | None = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    stream: bool = False,
+    sessions: RequestSessions = Depends(get_request_sessions),
+) -> List[OrderOutput]:
+    """Get a page of orders, or stream all of them as NDJSON with stream=true."""
+    if stream:
+        if after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="after cannot be combined with stream=true",
+            )
+        # The stream opens its own session; none is taken from the request.
+        return StreamingResponse(_stream_ndjson(), media_type="application/x-ndjson")
+    session = await sessions.get(read_only=True)
+    rows = await OrderService.get_all(session=session, after=after, limit=limit)
+    response = RowsJSONResponse(rows)
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = rows[-1].order_id
+    return response
+
+
+@router.get("/export", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_orders(
+    format: Literal["csv", "parquet"] = "csv",
+    user_id: str | None = None,
+    order_status: str | None = Query(None, alias="status"),
+    batch_size: int = Query(EXPORT_BATCH_SIZE_DEFAULT, ge=1, le=EXPORT_BATCH_SIZE_MAX),
+) -> StreamingResponse:
+    """Stream orders as a CSV or Parquet file, optionally filtered by user and status."""
+    if format == "parquet" and export.pq is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow on the server",
+        )
+    media_type = export.PARQUET_MEDIA_TYPE if format == "parquet" else export.CSV_MEDIA_TYPE
+    return StreamingResponse(
+        _stream_export(format, user_id, order_status, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
+
+
+@router.get(
+    "/aggregate",
+    response_model=List[OrderAggregateOutput],
+    response_model_exclude_unset=True,
+    status_code=status.HTTP_200_OK,
+)
+async def aggregate(
+    group_by: List[OrderAggregateDimension] = Query([]),
+    bucket: TimeBucket | None = None,
+    user_id: str | None = None,
+    order_status: str | None = Query(None, alias="status"),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    session: AsyncSession = Depends(get_read_session),
+) -> List[OrderAggregateOutput]:
+    """Order count and total amount grouped by user_id, status and/or a created_at time bucket."""
+    return await OrderService.aggregate(
+        session=session,
+        group_by=group_by,
+        bucket=bucket,
+        user_id=user_id,
+        status=order_status,
+        created_after=created_after,
+        created_before=created_before,
+    )
 
 
 @router.get("/{order_id}", response_model=OrderOutput, status_code=status.HTTP_200_OK)
-async def get_by_id(order_id: str) -> OrderOutput:
-    """Get order by ID."""
-    async with factory.get_session() as session:
-        return await OrderService.get_by_id(session=session, order_id=order_id)
+async def get_by_id(
+    order_id: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(get_read_session),
+) -> OrderOutput:
+    """Get order by ID, or 304 when If-None-Match still matches it."""
+    order = await OrderService.get_by_id(session=session, order_id=order_id)
+    etag = make_etag(_order_tag(order))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    return order
 
 
 @router.get("/", response_model=List[OrderOutput], status_code=status.HTTP_200_OK)
-async def get_by_user_id(user_id: str) -> List[OrderOutput]:
-    """Get orders by user ID."""
-    async with factory.get_session() as session:
-        return await OrderService.get_by_user_id(session=session, user_id=user_id)
+async def get_by_user_id(
+    user_id: str,
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(get_read_session),
+) -> List[OrderOutput]:
+    """Get orders by user ID, or 304 when If-None-Match still matches them."""
+    rows = await OrderService.get_by_user_id(session=session, user_id=user_id)
+    etag = _user_orders_etag(user_id, rows)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return RowsJSONResponse(rows, headers=cache_headers(etag))
 
 
 @router.post("/", response_model=OrderOutput, status_code=status.HTTP_201_CREATED)
-async def create(order: OrderCreateInput) -> OrderOutput:
+async def create(
+    order: OrderCreateInput, session: AsyncSession = Depends(get_write_session)
+) -> OrderOutput:
     """Create new order."""
-    async with factory.get_session() as session:
-        return await OrderService.create(session=session, order_create=order)
+    return await OrderService.create(session=session, order_create=order)
+
+
+@router.post("/bulk", response_model=List[OrderBulkResult], status_code=status.HTTP_200_OK)
+async def create_bulk(
+    orders: List[OrderCreateInput] = Body(..., max_length=BULK_SIZE_MAX),
+    session: AsyncSession = Depends(get_write_session),
+) -> List[OrderBulkResult]:
+    """Create orders in bulk."""
+    return await OrderService.create_many(session=session, orders_create=orders)
+
+
+@router.patch("/bulk", response_model=List[OrderBulkResult], status_code=status.HTTP_200_OK)
+async def update_bulk(
+    orders: List[OrderBulkUpdateInput] = Body(..., max_length=BULK_SIZE_MAX),
+    session: AsyncSession = Depends(get_write_session),
+) -> List[OrderBulkResult]:
+    """Update order statuses in bulk."""
+    return await OrderService.update_many(session=session, orders_update=orders)
 
 
 @router.patch("/{order_id}", response_model=OrderOutput, status_code=status.HTTP_200_OK)
-async def update(order_id: str, order_update: OrderUpdateInput) -> OrderOutput:
+async def update(
+    order_id: str,
+    order_update: OrderUpdateInput,
+    session: AsyncSession = Depends(get_write_session),
+) -> OrderOutput:
     """Update order."""
-    async with factory.get_session() as session:
-        return await OrderService.update(session=session, order_id=order_id, order_update=order_update)
+    return await OrderService.update(session=session, order_id=order_id, order_update=order_update)
 
 
 @router.delete("/{order_id}", response_model=None, status_code=status.HTTP_204_NO_CONTENT)
-async def delete(order_id: str) -> None:
+async def delete(
+    order_id: str, session: AsyncSession = Depends(get_write_session)
+) -> None:
     """Delete order."""
-    async with factory.get_session() as session:
-        await OrderService.delete(session=session, order_id=order_id)
-
+    await OrderService.delete(session=session, order_id=order_id)
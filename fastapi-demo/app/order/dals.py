@@ -1,22 +1,217 @@
-from typing import List
-from sqlalchemy import select
+import importlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Sequence, Tuple
+from sqlalchemy import ColumnElement, Row, case, delete, func, insert, literal_column, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.engine import Result
 
-from .models import Order
+from app.core import settings
+from .models import Order, OrderSummary
 from .schemas import OrderCreateInput, OrderUpdateInput
 
+BULK_CHUNK_SIZE = 500
+
+# Columns of the public order representation; list reads select these as plain
+# rows instead of loading ORM objects.
+ORDER_COLUMNS = (Order.order_id, Order.user_id, Order.amount, Order.status, Order.version)
+
+# Columns written by exports, which also carry the creation time.
+EXPORT_COLUMNS = ORDER_COLUMNS + (Order.created_at,)
+
+# Dialect modules providing insert().on_conflict_do_update(), imported on first
+# use so that startup does not load dialects the configured database never uses.
+_UPSERT_DIALECTS = {
+    "postgresql": "sqlalchemy.dialects.postgresql",
+    "sqlite": "sqlalchemy.dialects.sqlite",
+}
+
+
+# strftime() format and modifiers truncating created_at to a time bucket on
+# SQLite; other databases use date_trunc(). Weeks start on Monday.
+_SQLITE_TIME_BUCKETS = {
+    "hour": ("%Y-%m-%d %H:00:00",),
+    "day": ("%Y-%m-%d 00:00:00",),
+    "week": ("%Y-%m-%d 00:00:00", "weekday 0", "-6 days"),
+    "month": ("%Y-%m-01 00:00:00",),
+}
+
+
+def _time_bucket(dialect_name: str, bucket: str) -> ColumnElement:
+    pattern, *modifiers = _SQLITE_TIME_BUCKETS[bucket]  # KeyError for unknown buckets
+    if dialect_name == "sqlite":
+        return func.strftime(pattern, Order.created_at, *modifiers)
+    # Inlined rather than bound: PostgreSQL only matches the GROUP BY expression
+    # to the selected one when both use the same unit literal.
+    return func.date_trunc(literal_column(f"'{bucket}'"), Order.created_at)
+
+
+# (user_id, status) -> (order count, total amount) to add to the summary.
+SummaryDeltas = Dict[Tuple[str, str], Tuple[int, float]]
+
+
+def _summary_deltas(
+    added: Iterable[Tuple[str, str, float]] = (), removed: Iterable[Tuple[str, str, float]] = ()
+) -> SummaryDeltas:
+    """Summary changes for orders (user_id, status, amount) added to and removed from their groups."""
+    deltas: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+    for sign, orders in ((1, added), (-1, removed)):
+        for user_id, order_status, amount in orders:
+            delta = deltas[user_id, order_status]
+            delta[0] += sign
+            delta[1] += sign * amount
+    return {key: (count, amount) for key, (count, amount) in deltas.items() if count or amount}
+
 
 class OrderDAL:
     """Data Access Layer for Order model."""
     
     @staticmethod
-    async def get_all(session: AsyncSession) -> List[Order]:
-        """Get all orders."""
-        stmp = select(Order)
-        result: Result = await session.scalars(stmp)
+    async def get_all(
+        session: AsyncSession, after: str | None = None, limit: int = 100
+    ) -> List[Row]:
+        """Get one page of order rows, keyset-paginated by order_id."""
+        stmp = select(*ORDER_COLUMNS).order_by(Order.order_id).limit(limit)
+        if after is not None:
+            stmp = stmp.where(Order.order_id > after)
+        result: Result = await session.execute(stmp)
+        return list(result.all())
+
+    @staticmethod
+    async def stream_all(
+        session: AsyncSession,
+        chunk_size: int = 1000,
+        user_id: str | None = None,
+        status: str | None = None,
+        columns: Sequence = ORDER_COLUMNS,
+    ) -> AsyncIterator[Row]:
+        """Stream order rows with a server-side cursor, optionally filtered."""
+        stmp = select(*columns).order_by(Order.id).execution_options(yield_per=chunk_size)
+        if user_id is not None:
+            stmp = stmp.where(Order.user_id == user_id)
+        if status is not None:
+            stmp = stmp.where(Order.status == status)
+        result = await session.stream(stmp)
+        async for row in result:
+            yield row
+
+    @staticmethod
+    async def aggregate(
+        session: AsyncSession,
+        group_by: Sequence[str] = (),
+        bucket: str | None = None,
+        user_id: str | None = None,
+        status: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> List[Row]:
+        """Order count and total amount per group with one GROUP BY query.
+
+        group_by names Order columns; bucket adds the created_at time bucket.
+        """
+        dimensions: List[ColumnElement] = [getattr(Order, name) for name in group_by]
+        if bucket is not None:
+            dimensions.append(_time_bucket(session.bind.dialect.name, bucket).label("bucket"))
+        stmp = (
+            select(
+                *dimensions,
+                func.count(Order.id).label("order_count"),
+                func.coalesce(func.sum(Order.amount), 0.0).label("total_amount"),
+            )
+            .group_by(*dimensions)
+            .order_by(*dimensions)
+        )
+        if user_id is not None:
+            stmp = stmp.where(Order.user_id == user_id)
+        if status is not None:
+            stmp = stmp.where(Order.status == status)
+        if created_after is not None:
+            stmp = stmp.where(Order.created_at >= created_after)
+        if created_before is not None:
+            stmp = stmp.where(Order.created_at < created_before)
+        result: Result = await session.execute(stmp)
         return list(result.all())
 
+    @staticmethod
+    async def aggregate_summary(
+        session: AsyncSession,
+        group_by: Sequence[str] = (),
+        user_id: str | None = None,
+        status: str | None = None,
+    ) -> List[Row]:
+        """Like aggregate() without time columns, read from the summary table."""
+        dimensions = [getattr(OrderSummary, name) for name in group_by]
+        stmp = (
+            select(
+                *dimensions,
+                func.coalesce(func.sum(OrderSummary.order_count), 0).label("order_count"),
+                func.coalesce(func.sum(OrderSummary.total_amount), 0.0).label("total_amount"),
+            )
+            .where(OrderSummary.order_count > 0)
+            .group_by(*dimensions)
+            .order_by(*dimensions)
+        )
+        if user_id is not None:
+            stmp = stmp.where(OrderSummary.user_id == user_id)
+        if status is not None:
+            stmp = stmp.where(OrderSummary.status == status)
+        result: Result = await session.execute(stmp)
+        return list(result.all())
+
+    @staticmethod
+    async def apply_summary_deltas(session: AsyncSession, deltas: SummaryDeltas) -> None:
+        """Add the deltas to the summary rows with one upsert, without committing."""
+        if not deltas:
+            return
+        dialect = importlib.import_module(_UPSERT_DIALECTS[session.bind.dialect.name])
+        stmp = dialect.insert(OrderSummary)
+        stmp = stmp.on_conflict_do_update(
+            index_elements=[OrderSummary.user_id, OrderSummary.status],
+            set_={
+                "order_count": OrderSummary.order_count + stmp.excluded.order_count,
+                "total_amount": OrderSummary.total_amount + stmp.excluded.total_amount,
+            },
+        )
+        # Sorted, so concurrent writers lock the summary rows in the same order.
+        await session.execute(stmp, [
+            {"user_id": user_id, "status": order_status, "order_count": count, "total_amount": amount}
+            for (user_id, order_status), (count, amount) in sorted(deltas.items())
+        ])
+
+    @staticmethod
+    async def rebuild_summary(session: AsyncSession) -> None:
+        """Recompute the whole summary table from the orders table, in one transaction.
+
+        Safe while the app takes writes: order writes are held off until it commits,
+        so none of their summary deltas is lost or counted twice.
+        """
+        if session.bind.dialect.name == "postgresql":
+            # Waits for in-flight order writes and blocks new ones (and other rebuilds).
+            await session.execute(text("LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE"))
+        # On SQLite the DELETE takes the database write lock before orders are read.
+        await session.execute(delete(OrderSummary))
+        await session.execute(
+            insert(OrderSummary).from_select(
+                ["user_id", "status", "order_count", "total_amount"],
+                select(Order.user_id, Order.status, func.count(Order.id), func.sum(Order.amount))
+                .group_by(Order.user_id, Order.status),
+            )
+        )
+        await session.commit()
+
+    @staticmethod
+    async def _get_statuses_for_update(
+        session: AsyncSession, order_ids: Sequence[str]
+    ) -> Dict[str, Row]:
+        """(user_id, status, amount) of orders about to change status, locked until commit."""
+        stmp = (
+            select(Order.order_id, Order.user_id, Order.status, Order.amount)
+            .where(Order.order_id.in_(order_ids))
+            .with_for_update()
+        )
+        result: Result = await session.execute(stmp)
+        return {row.order_id: row for row in result}
+
     @staticmethod
     async def get_by_id(session: AsyncSession, order_id: str) -> Order | None:
         """Get order by ID."""
@@ -24,36 +219,151 @@ class OrderDAL:
         return await session.scalar(stmp)
 
     @staticmethod
-    async def get_by_user_id(session: AsyncSession, user_id: str) -> List[Order]:
-        """Get all orders for given user."""
-        stmp = select(Order).where(Order.user_id == user_id)
-        result: Result = await session.scalars(stmp)
+    async def get_by_user_id(session: AsyncSession, user_id: str) -> List[Row]:
+        """Get all order rows for given user."""
+        stmp = select(*ORDER_COLUMNS).where(Order.user_id == user_id).order_by(Order.order_id)
+        result: Result = await session.execute(stmp)
         return list(result.all())
 
+    @staticmethod
+    async def get_by_ids(session: AsyncSession, order_ids: Sequence[str]) -> List[Row]:
+        """Get order rows with any of the given IDs in one query."""
+        stmp = select(*ORDER_COLUMNS).where(Order.order_id.in_(order_ids))
+        result: Result = await session.execute(stmp)
+        return list(result.all())
+
+    @staticmethod
+    async def get_by_user_ids(session: AsyncSession, user_ids: Sequence[str]) -> List[Row]:
+        """Get order rows of any of the given users in one query."""
+        stmp = select(*ORDER_COLUMNS).where(Order.user_id.in_(user_ids))
+        result: Result = await session.execute(stmp)
+        return list(result.all())
+
+    @staticmethod
+    async def warm_up(session: AsyncSession) -> None:
+        """Run the hot read statements once so they are compiled and cached.
+
+        Uses a key that matches no order, so nothing is loaded.
+        """
+        missing = "__warmup__"
+        await OrderDAL.get_by_id(session=session, order_id=missing)
+        await OrderDAL.get_by_user_id(session=session, user_id=missing)
+        await OrderDAL.get_by_ids(session=session, order_ids=[missing])
+        await OrderDAL.get_by_user_ids(session=session, user_ids=[missing])
+        await OrderDAL.get_all(session=session, after=missing, limit=1)
+
     @staticmethod
     async def create(session: AsyncSession, order: Order) -> Order:
         """Create new order."""
         session.add(order)
+        if settings.order_summary_enabled:
+            await OrderDAL.apply_summary_deltas(
+                session, _summary_deltas(added=[(order.user_id, order.status, order.amount)])
+            )
         await session.commit()
         await session.refresh(order)
         return order
 
+    @staticmethod
+    async def create_many(
+        session: AsyncSession, rows: List[Dict[str, Any]]
+    ) -> List[Order]:
+        """Insert orders with multi-row INSERT ... RETURNING in one transaction.
+
+        Rows whose order_id already exists are skipped and not returned.
+        """
+        dialect = importlib.import_module(_UPSERT_DIALECTS[session.bind.dialect.name])
+        stmp = (
+            dialect.insert(Order)
+            .on_conflict_do_nothing(index_elements=[Order.order_id])
+            .returning(Order)
+        )
+        created: List[Order] = []
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            result: Result = await session.scalars(stmp, rows[start:start + BULK_CHUNK_SIZE])
+            created.extend(result.all())
+        if settings.order_summary_enabled:
+            await OrderDAL.apply_summary_deltas(session, _summary_deltas(
+                added=[(order.user_id, order.status, order.amount) for order in created]
+            ))
+        await session.commit()
+        return created
+
+    @staticmethod
+    async def update_status_many(
+        session: AsyncSession, statuses: Dict[str, str]
+    ) -> List[Order]:
+        """Set status for many orders with one UPDATE per chunk in one transaction.
+
+        Unknown order_ids are skipped and not returned.
+        """
+        order_ids = list(statuses)
+        updated: List[Order] = []
+        previous: Dict[str, Row] = {}
+        for start in range(0, len(order_ids), BULK_CHUNK_SIZE):
+            chunk = {
+                order_id: statuses[order_id]
+                for order_id in order_ids[start:start + BULK_CHUNK_SIZE]
+            }
+            if settings.order_summary_enabled:
+                previous.update(await OrderDAL._get_statuses_for_update(session, list(chunk)))
+            stmp = (
+                update(Order)
+                .where(Order.order_id.in_(chunk))
+                .values(status=case(chunk, value=Order.order_id), version=Order.version + 1)
+                .returning(Order)
+                .execution_options(synchronize_session=False)
+            )
+            result: Result = await session.scalars(stmp)
+            updated.extend(result.all())
+        if settings.order_summary_enabled:
+            await OrderDAL.apply_summary_deltas(session, _summary_deltas(
+                added=[(order.user_id, order.status, order.amount) for order in updated],
+                removed=[(row.user_id, row.status, row.amount) for row in previous.values()],
+            ))
+        await session.commit()
+        return updated
+
     @staticmethod
     async def update(
         session: AsyncSession,
-        order: Order,
+        order_id: str,
         order_update: OrderUpdateInput,
     ) -> Order | None:
-        """Update order."""
-        if order_update.status:
-            order.status = order_update.status
+        """Update order with a single UPDATE ... RETURNING statement."""
+        values = order_update.model_dump(exclude_none=True)
+        if not values:
+            return await OrderDAL.get_by_id(session=session, order_id=order_id)
+        previous: Row | None = None
+        if settings.order_summary_enabled and "status" in values:
+            previous = (await OrderDAL._get_statuses_for_update(session, [order_id])).get(order_id)
+        stmp = (
+            update(Order)
+            .where(Order.order_id == order_id)
+            .values(**values, version=Order.version + 1)
+            .returning(Order)
+            .execution_options(synchronize_session=False)
+        )
+        order: Order | None = await session.scalar(stmp)
+        if order is not None and previous is not None:
+            await OrderDAL.apply_summary_deltas(session, _summary_deltas(
+                added=[(order.user_id, order.status, order.amount)],
+                removed=[(previous.user_id, previous.status, previous.amount)],
+            ))
         await session.commit()
-        await session.refresh(order)
         return order
 
     @staticmethod
-    async def delete(session: AsyncSession, order: Order) -> None:
-        """Delete order."""
-        await session.delete(order)
+    async def delete(session: AsyncSession, order_id: str) -> bool:
+        """Delete order with a single DELETE ... RETURNING statement."""
+        stmp = (
+            delete(Order)
+            .where(Order.order_id == order_id)
+            .returning(Order.user_id, Order.status, Order.amount)
+            .execution_options(synchronize_session=False)
+        )
+        deleted: Row | None = (await session.execute(stmp)).first()
+        if deleted is not None and settings.order_summary_enabled:
+            await OrderDAL.apply_summary_deltas(session, _summary_deltas(removed=[tuple(deleted)]))
         await session.commit()
-
+        return deleted is not None
@@ -1,4 +1,6 @@
-from sqlalchemy import String, Float
+from datetime import datetime
+
+from sqlalchemy import String, Float, Integer, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 
@@ -6,8 +8,34 @@ from app.core import Base
 
 
 class Order(Base):
+    __table_args__ = (
+        Index("ix_orders_user_id_status", "user_id", "status"),
+        Index("ix_orders_created_at", "created_at"),
+    )
+
     order_id: Mapped[str] = mapped_column(String(100), unique=True)
     user_id: Mapped[str] = mapped_column(String(100))
     amount: Mapped[float] = mapped_column(Float)
     status: Mapped[str] = mapped_column(String(50), default="pending")
+    # Bumped on every update; HTTP ETags are derived from it.
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class OrderSummary(Base):
+    """Order count and total amount per (user_id, status), kept current by order writes.
 
+    Only maintained with ORDER_SUMMARY_ENABLED; `python cli.py migrate` rebuilds it.
+    """
+
+    __tablename__ = "order_summaries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "status", name="uq_order_summaries_user_id_status"),
+    )
+
+    user_id: Mapped[str] = mapped_column(String(100))
+    status: Mapped[str] = mapped_column(String(50))
+    order_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_amount: Mapped[float] = mapped_column(Float, default=0.0)
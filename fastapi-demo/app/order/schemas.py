@@ -1,12 +1,23 @@
+from datetime import datetime
+from enum import Enum
+
 from pydantic import BaseModel
 import strawberry
 
 
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 1000
+BULK_SIZE_MAX = 5000
+EXPORT_BATCH_SIZE_DEFAULT = 10_000
+EXPORT_BATCH_SIZE_MAX = 100_000
+
+
 class OrderOutput(BaseModel):
     order_id: str
     user_id: str
     amount: float
     status: str
+    version: int
 
 
 class OrderCreateInput(BaseModel):
@@ -19,12 +30,66 @@ class OrderUpdateInput(BaseModel):
     status: str | None = None
 
 
+class OrderBulkUpdateInput(BaseModel):
+    order_id: str
+    status: str
+
+
+@strawberry.enum
+class OrderAggregateDimension(str, Enum):
+    USER_ID = "user_id"
+    STATUS = "status"
+
+
+@strawberry.enum
+class TimeBucket(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class OrderAggregateOutput(BaseModel):
+    """Totals of one group; only the grouped-by fields are set."""
+
+    user_id: str | None = None
+    status: str | None = None
+    bucket: datetime | None = None
+    order_count: int
+    total_amount: float
+
+
+class OrderBulkResult(BaseModel):
+    order_id: str
+    success: bool
+    order: OrderOutput | None = None
+    error: str | None = None
+
+
 @strawberry.type
 class OrderOutputGraphQL:
     order_id: str
     user_id: str
     amount: float
     status: str
+    version: int
+
+
+@strawberry.type
+class OrderAggregateGraphQL:
+    user_id: str | None = None
+    status: str | None = None
+    bucket: datetime | None = None
+    order_count: int
+    total_amount: float
+
+
+@strawberry.type
+class OrderBulkResultGraphQL:
+    order_id: str
+    success: bool
+    order: OrderOutputGraphQL | None = None
+    error: str | None = None
 
 
 @strawberry.input
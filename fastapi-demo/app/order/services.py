@@ -1,10 +1,16 @@
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Literal, Sequence, Set
 from fastapi import HTTPException
 from fastapi import status
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .dals import OrderDAL
+from ..core import settings
+from ..core.export import arrow_schema, csv_chunks, parquet_chunks
+from .dals import EXPORT_COLUMNS, OrderDAL
 from .schemas import OrderOutput, OrderCreateInput, OrderUpdateInput
+from .schemas import OrderBulkUpdateInput, OrderBulkResult, EXPORT_BATCH_SIZE_DEFAULT
+from .schemas import OrderAggregateDimension, OrderAggregateOutput, TimeBucket
 from .models import Order
 
 
@@ -12,17 +18,67 @@ class OrderService:
     """Service layer for order business logic."""
     
     @staticmethod
-    async def get_all(session: AsyncSession) -> List[OrderOutput]:
-        """Get all orders."""
-        orders: List[Order] = await OrderDAL.get_all(session=session)
-        return [
-            OrderOutput(
-                order_id=order.order_id,
-                user_id=order.user_id,
-                amount=order.amount,
-                status=order.status
-            ) for order in orders
-        ]
+    async def get_all(
+        session: AsyncSession, after: str | None = None, limit: int = 100
+    ) -> List[Row]:
+        """Get one page of order rows after the given order_id cursor."""
+        return await OrderDAL.get_all(session=session, after=after, limit=limit)
+
+    @staticmethod
+    async def stream_all(session: AsyncSession) -> AsyncIterator[Row]:
+        """Stream all order rows without materializing the table."""
+        async for row in OrderDAL.stream_all(session=session):
+            yield row
+
+    @staticmethod
+    async def export(
+        session: AsyncSession,
+        format: Literal["csv", "parquet"],
+        user_id: str | None = None,
+        status: str | None = None,
+        batch_size: int = EXPORT_BATCH_SIZE_DEFAULT,
+    ) -> AsyncIterator[bytes]:
+        """Encode the matching orders as CSV or Parquet, batch_size rows at a time."""
+        rows = OrderDAL.stream_all(
+            session=session, chunk_size=batch_size, user_id=user_id, status=status, columns=EXPORT_COLUMNS
+        )
+        if format == "parquet":
+            chunks = parquet_chunks(rows, arrow_schema(EXPORT_COLUMNS), batch_size)
+        else:
+            chunks = csv_chunks(rows, [column.key for column in EXPORT_COLUMNS], batch_size)
+        async for chunk in chunks:
+            yield chunk
+
+    @staticmethod
+    async def aggregate(
+        session: AsyncSession,
+        group_by: Sequence[OrderAggregateDimension] = (),
+        bucket: TimeBucket | None = None,
+        user_id: str | None = None,
+        status: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> List[OrderAggregateOutput]:
+        """Order count and total amount per group, computed by the database.
+
+        Served from the summary table when it is maintained and no time column is involved.
+        """
+        dimensions = list(dict.fromkeys(dimension.value for dimension in group_by))
+        if settings.order_summary_enabled and bucket is None and created_after is None and created_before is None:
+            rows = await OrderDAL.aggregate_summary(
+                session=session, group_by=dimensions, user_id=user_id, status=status
+            )
+        else:
+            rows = await OrderDAL.aggregate(
+                session=session,
+                group_by=dimensions,
+                bucket=bucket.value if bucket is not None else None,
+                user_id=user_id,
+                status=status,
+                created_after=created_after,
+                created_before=created_before,
+            )
+        return [OrderAggregateOutput(**row._asdict()) for row in rows]
 
     @staticmethod
     async def get_by_id(
@@ -35,7 +91,8 @@ class OrderService:
                 order_id=order.order_id,
                 user_id=order.user_id,
                 amount=order.amount,
-                status=order.status
+                status=order.status,
+                version=order.version,
             )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,19 +100,35 @@ class OrderService:
         )
 
     @staticmethod
-    async def get_by_user_id(
-        session: AsyncSession, user_id: str
-    ) -> List[OrderOutput]:
-        """Get all orders for given user."""
-        orders: List[Order] = await OrderDAL.get_by_user_id(session=session, user_id=user_id)
-        return [
-            OrderOutput(
-                order_id=order.order_id,
-                user_id=order.user_id,
-                amount=order.amount,
-                status=order.status
-            ) for order in orders
-        ]
+    async def get_by_user_id(session: AsyncSession, user_id: str) -> List[Row]:
+        """Get all order rows for given user."""
+        return await OrderDAL.get_by_user_id(session=session, user_id=user_id)
+
+    @staticmethod
+    async def warm_up(session: AsyncSession) -> None:
+        """Compile and cache the hot order reads before the first request."""
+        await OrderDAL.warm_up(session=session)
+
+    @staticmethod
+    async def get_many_by_id(
+        session: AsyncSession, order_ids: Sequence[str]
+    ) -> List[Row | None]:
+        """Get order rows for many IDs in one query, None where not found, in input order."""
+        rows: Dict[str, Row] = {
+            row.order_id: row
+            for row in await OrderDAL.get_by_ids(session=session, order_ids=order_ids)
+        }
+        return [rows.get(order_id) for order_id in order_ids]
+
+    @staticmethod
+    async def get_many_by_user_id(
+        session: AsyncSession, user_ids: Sequence[str]
+    ) -> List[List[Row]]:
+        """Get order rows for many users in one query, grouped in input order."""
+        rows: Dict[str, List[Row]] = {user_id: [] for user_id in user_ids}
+        for row in await OrderDAL.get_by_user_ids(session=session, user_ids=user_ids):
+            rows[row.user_id].append(row)
+        return [rows[user_id] for user_id in user_ids]
 
     @staticmethod
     async def create(session: AsyncSession, order_create: OrderCreateInput) -> OrderOutput:
@@ -71,9 +144,97 @@ class OrderService:
             order_id=order.order_id,
             user_id=order.user_id,
             amount=order.amount,
-            status=order.status
+            status=order.status,
+            version=order.version,
         )
 
+    @staticmethod
+    async def create_many(
+        session: AsyncSession, orders_create: List[OrderCreateInput]
+    ) -> List[OrderBulkResult]:
+        """Create orders in bulk, reporting success or failure per item."""
+        rows: Dict[str, Dict] = {}
+        for order_create in orders_create:
+            rows.setdefault(order_create.order_id, {
+                "order_id": order_create.order_id,
+                "user_id": order_create.user_id,
+                "amount": order_create.amount,
+                "status": "pending",
+            })
+        created: Dict[str, Order] = {
+            order.order_id: order
+            for order in await OrderDAL.create_many(session=session, rows=list(rows.values()))
+        }
+
+        results: List[OrderBulkResult] = []
+        for order_create in orders_create:
+            order: Order | None = created.pop(order_create.order_id, None)
+            if order is None:
+                results.append(OrderBulkResult(
+                    order_id=order_create.order_id,
+                    success=False,
+                    error=f"Order {order_create.order_id} already exists!",
+                ))
+                continue
+            results.append(OrderBulkResult(
+                order_id=order.order_id,
+                success=True,
+                order=OrderOutput(
+                    order_id=order.order_id,
+                    user_id=order.user_id,
+                    amount=order.amount,
+                    status=order.status,
+                    version=order.version,
+                ),
+            ))
+        return results
+
+    @staticmethod
+    async def update_many(
+        session: AsyncSession, orders_update: List[OrderBulkUpdateInput]
+    ) -> List[OrderBulkResult]:
+        """Update order statuses in bulk, reporting success or failure per item."""
+        statuses: Dict[str, str] = {}
+        for order_update in orders_update:
+            statuses.setdefault(order_update.order_id, order_update.status)
+        updated: Dict[str, Order] = {
+            order.order_id: order
+            for order in await OrderDAL.update_status_many(session=session, statuses=statuses)
+        }
+
+        results: List[OrderBulkResult] = []
+        seen: Set[str] = set()
+        for order_update in orders_update:
+            order: Order | None = updated.get(order_update.order_id)
+            if order is None:
+                results.append(OrderBulkResult(
+                    order_id=order_update.order_id,
+                    success=False,
+                    error=f"Order {order_update.order_id} not found!",
+                ))
+                continue
+            if order.order_id in seen:
+                # Like create_many: the first item for an order wins.
+                results.append(OrderBulkResult(
+                    order_id=order.order_id,
+                    success=False,
+                    error=f"Order {order.order_id} is already updated in this request!",
+                ))
+                continue
+            seen.add(order.order_id)
+            results.append(OrderBulkResult(
+                order_id=order.order_id,
+                success=True,
+                order=OrderOutput(
+                    order_id=order.order_id,
+                    user_id=order.user_id,
+                    amount=order.amount,
+                    status=order.status,
+                    version=order.version,
+                ),
+            ))
+        return results
+
     @staticmethod
     async def update(
         session: AsyncSession,
@@ -81,16 +242,16 @@ class OrderService:
         order_update: OrderUpdateInput,
     ) -> OrderOutput:
         """Update order or raise 404."""
-        order: Order | None = await OrderDAL.get_by_id(session=session, order_id=order_id)
+        order: Order | None = await OrderDAL.update(
+            session=session, order_id=order_id, order_update=order_update
+        )
         if order:
-            order = await OrderDAL.update(
-                session=session, order=order, order_update=order_update
-            )
             return OrderOutput(
                 order_id=order.order_id,
                 user_id=order.user_id,
                 amount=order.amount,
-                status=order.status
+                status=order.status,
+                version=order.version,
             )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,12 +261,9 @@ class OrderService:
     @staticmethod
     async def delete(session: AsyncSession, order_id: str) -> None:
         """Delete order or raise 404."""
-        order: Order | None = await OrderDAL.get_by_id(session=session, order_id=order_id)
-        if order:
-            await OrderDAL.delete(session=session, order=order)
+        if await OrderDAL.delete(session=session, order_id=order_id):
             return
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order {order_id} not found!",
         )
-
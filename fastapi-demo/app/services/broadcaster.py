@@ -0,0 +1,102 @@
+import asyncio
+from typing import AsyncIterator, List, Optional, Set
+
+from app.services.event_store import EventStore, Event
+
+
+class Subscription:
+    """Bounded buffer of live events for one subscriber.
+
+    When the subscriber falls behind and the buffer is full, the buffer is
+    dropped and replaced by a single None marker: the subscriber then catches
+    up from the store instead of slowing down appends.
+    """
+
+    def __init__(self, buffer_size: int) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed: bool = False
+
+    def offer(self, event: Event) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next live event; None after an overflow. Raises TimeoutError when idle."""
+        event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        if event is None:
+            self.overflowed = False
+        return event
+
+
+class EventBroadcaster:
+    """In-process fan-out of appended events to live subscribers."""
+
+    def __init__(self, buffer_size: int = 1000) -> None:
+        self.buffer_size: int = buffer_size
+        self._subscriptions: Set[Subscription] = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.buffer_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def publish(self, events: List[Event]) -> None:
+        """EventStore listener: never blocks, slow subscribers overflow instead."""
+        for subscription in self._subscriptions:
+            for event in events:
+                subscription.offer(event)
+
+
+async def stream_events(
+    event_store: EventStore,
+    broadcaster: EventBroadcaster,
+    after: int = 0,
+    follow: bool = True,
+    batch_size: int = 1000,
+    keepalive: Optional[float] = None,
+) -> AsyncIterator[Optional[Event]]:
+    """Events with position greater than after, then live ones if follow is set.
+
+    Catch-up reads the store in batches; live events come from the broadcaster
+    and any gap (overflow or missed event) falls back to catch-up. When
+    keepalive is set, None is yielded after that many idle seconds.
+    """
+    # Subscribe before catching up so nothing appended in between is missed.
+    subscription = broadcaster.subscribe() if follow else None
+    position = after
+    try:
+        while True:
+            while True:
+                events = await event_store.read_all(after=position, limit=batch_size)
+                for event in events:
+                    yield event
+                    position = event.position
+                if len(events) < batch_size:
+                    break
+            if subscription is None:
+                return
+
+            while True:
+                try:
+                    event = await subscription.get(timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None or event.position > position + 1:
+                    break
+                if event.position == position + 1:
+                    yield event
+                    position = event.position
+    finally:
+        if subscription is not None:
+            broadcaster.unsubscribe(subscription)
@@ -0,0 +1,90 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Type
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+from app.services.event_store import Event
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_record(event: Event) -> List[Any]:
+    # Positional record: no field names repeated in every payload.
+    return [
+        event.event_type,
+        event.aggregate_id,
+        event.sequence,
+        event.position,
+        (event.timestamp - _EPOCH) // _MICROSECOND,
+        event.data,
+    ]
+
+
+def _from_record(record: List[Any]) -> Event:
+    event_type, aggregate_id, sequence, position, timestamp, data = record
+    return Event(
+        event_type,
+        aggregate_id,
+        data,
+        timestamp=_EPOCH + timestamp * _MICROSECOND,
+        sequence=sequence,
+        position=position,
+    )
+
+
+class EventCodec(ABC):
+    """Encodes events to bytes for persistence and decodes them on replay."""
+
+    name: str = ""
+
+    @abstractmethod
+    def encode(self, event: Event) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Event:
+        ...
+
+
+class OrjsonEventCodec(EventCodec):
+    name = "orjson"
+
+    def encode(self, event: Event) -> bytes:
+        return orjson.dumps(_to_record(event))
+
+    def decode(self, payload: bytes) -> Event:
+        return _from_record(orjson.loads(payload))
+
+
+class MsgpackEventCodec(EventCodec):
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError("The msgpack event codec requires the msgpack package")
+
+    def encode(self, event: Event) -> bytes:
+        return msgpack.packb(_to_record(event), use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Event:
+        return _from_record(msgpack.unpackb(payload, raw=False))
+
+
+CODECS: Dict[str, Type[EventCodec]] = {
+    OrjsonEventCodec.name: OrjsonEventCodec,
+    MsgpackEventCodec.name: MsgpackEventCodec,
+}
+
+
+def get_codec(name: str) -> EventCodec:
+    """Codec registered under name, e.g. "orjson" or "msgpack"."""
+    if name not in CODECS:
+        raise ValueError(f"Unknown event codec: {name}")
+    return CODECS[name]()
@@ -1,6 +1,7 @@
 from typing import Dict, Any
-from app.services.event_store import EventStore, Event
+from app.services.event_store import ConcurrencyError, EventStore, Event
 from app.services.saga_coordinator import SagaCoordinator
+from app.services.unit_of_work import UnitOfWork
 
 class CommandHandler:
     """Handler for command operations in CQRS pattern."""
@@ -9,25 +10,37 @@ class CommandHandler:
         self.event_store: EventStore = event_store
         self.saga_coordinator: SagaCoordinator = SagaCoordinator(event_store)
     
-    async def handle_create_order(self, order_data: Dict[str, Any]) -> str:
-        """Create order command: starts saga and emits OrderCreated event."""
+    async def handle_create_order(self, order_data: Dict[str, Any], wait: bool = True) -> str:
+        """Create order command: emits OrderCreated event, then starts the saga.
+
+        The saga only starts once OrderCreated is committed, so a create that
+        loses a race leaves no saga behind. With wait=False the saga is only
+        queued and runs in the background. Raises ConcurrencyError if the order
+        already exists.
+        """
         order_id: str = order_data.get("id")
+        version: int = await self.event_store.get_version(order_id)
+        if version != 0:
+            raise ConcurrencyError(order_id, 0, version)
         
-        saga_id: str = await self.saga_coordinator.start_saga("order_creation", {
+        async with UnitOfWork(self.event_store) as uow:
+            uow.expect(order_id, 0)
+            uow.add(Event("OrderCreated", order_id, order_data))
+
+        return await self.saga_coordinator.start_saga("order_creation", {
             "order_id": order_id,
             "user_id": order_data.get("user_id"),
             "amount": order_data.get("amount")
-        })
-        
-        event: Event = Event("OrderCreated", order_id, order_data)
-        await self.event_store.append(event)
-        
-        return saga_id
+        }, wait=wait)
     
     async def handle_cancel_order(self, order_id: str, reason: str) -> None:
-        """Cancel order command: emits OrderCancelled event and compensates saga."""
-        event: Event = Event("OrderCancelled", order_id, {"reason": reason})
-        await self.event_store.append(event)
+        """Cancel order command: emits OrderCancelled event and compensates saga.
         
-        await self.saga_coordinator.compensate("order_creation", order_id)
+        Raises ConcurrencyError if the order changed while being cancelled.
+        """
+        async with UnitOfWork(self.event_store) as uow:
+            uow.expect(order_id, await self.event_store.get_version(order_id))
+            uow.add(Event("OrderCancelled", order_id, {"reason": reason}))
+            
+            await self.saga_coordinator.compensate("order_creation", order_id, uow)
 
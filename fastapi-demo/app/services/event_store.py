@@ -1,34 +1,127 @@
-from typing import List, Dict, Any
+import sys
+from collections import deque
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import Callable, Deque, List, Dict, Any, Mapping, Optional, Tuple
 from datetime import datetime, timezone
 
+@dataclass(frozen=True, slots=True)
 class Event:
-    """Event representing a domain event in event sourcing."""
+    """Event representing a domain event in event sourcing.
     
-    def __init__(self, event_type: str, aggregate_id: str, data: Dict[str, Any]) -> None:
-        self.event_type: str = event_type
+    Immutable and slotted, with event_type interned, so that large numbers of
+    stored events stay small.
+    """
+    
+    event_type: str
+    aggregate_id: str
+    data: Dict[str, Any]
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Position within the aggregate's stream (1, 2, ...), assigned on append.
+    sequence: int = 0
+    # Position within the whole log (1, 2, ...), assigned on append.
+    position: int = 0
+    
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "event_type", sys.intern(self.event_type))
+
+class ConcurrencyError(Exception):
+    """An aggregate's stream moved past the version the writer expected."""
+    
+    def __init__(self, aggregate_id: str, expected_version: int, actual_version: int) -> None:
+        super().__init__(
+            f"Aggregate {aggregate_id} is at version {actual_version}, expected {expected_version}"
+        )
         self.aggregate_id: str = aggregate_id
-        self.data: Dict[str, Any] = data
-        self.timestamp: datetime = datetime.now(timezone.utc)
+        self.expected_version: int = expected_version
+        self.actual_version: int = actual_version
 
 class EventStore:
-    """In-memory event store for event sourcing pattern."""
+    """In-memory event store for event sourcing pattern.
+
+    Every appended event also gets an outbox entry in the same step, so the
+    relay publishes exactly the events that were stored. Events are numbered
+    per aggregate; writers pass the version they read to detect conflicting
+    writes instead of locking. Listeners are called synchronously with every
+    appended batch and must not block.
+    """
     
     def __init__(self) -> None:
         self._events: List[Event] = []
+        self._versions: Dict[str, int] = {}
+        self._outbox: Deque[Tuple[int, Event]] = deque()
+        self._outbox_position: int = 0
+        self._listeners: List[Callable[[List[Event]], None]] = []
+        # Set once initialize() has finished loading; readiness waits for it.
+        self.ready: bool = False
     
     async def initialize(self) -> None:
         """Initialize event store."""
-        pass
+        self.ready = True
+    
+    async def append(self, event: Event, expected_version: Optional[int] = None) -> None:
+        """Append event to store, checking its aggregate is at expected_version."""
+        expected_versions = None if expected_version is None else {event.aggregate_id: expected_version}
+        await self.append_batch([event], expected_versions)
     
-    async def append(self, event: Event) -> None:
-        """Append event to store."""
-        self._events.append(event)
+    async def append_batch(
+        self, events: List[Event], expected_versions: Optional[Mapping[str, int]] = None
+    ) -> None:
+        """Append events and their outbox entries all at once.
+        
+        expected_versions maps aggregate IDs to the version the writer read
+        (0 for a new aggregate); on any mismatch nothing is appended and
+        ConcurrencyError is raised.
+        """
+        for aggregate_id, expected_version in (expected_versions or {}).items():
+            actual_version = self._versions.get(aggregate_id, 0)
+            if actual_version != expected_version:
+                raise ConcurrencyError(aggregate_id, expected_version, actual_version)
+        
+        stored: List[Event] = []
+        for event in events:
+            sequence = self._versions.get(event.aggregate_id, 0) + 1
+            self._versions[event.aggregate_id] = sequence
+            stored.append(replace(
+                event, sequence=sequence, position=len(self._events) + len(stored) + 1
+            ))
+        self._events.extend(stored)
+        for event in stored:
+            self._outbox_position += 1
+            self._outbox.append((self._outbox_position, event))
+        for listener in self._listeners:
+            listener(stored)
     
     async def get_events(self, aggregate_id: str) -> List[Event]:
         """Get all events for given aggregate."""
         return [e for e in self._events if e.aggregate_id == aggregate_id]
     
+    async def read_all(self, after: int = 0, limit: int = 1000) -> List[Event]:
+        """Get up to limit events of the whole log with position greater than after."""
+        return self._events[after:after + limit]
+    
+    async def get_position(self) -> int:
+        """Position of the last appended event, 0 if the log is empty."""
+        return len(self._events)
+    
+    def add_listener(self, listener: Callable[[List[Event]], None]) -> None:
+        """Call listener with every batch of events once it is appended."""
+        self._listeners.append(listener)
+    
+    async def get_version(self, aggregate_id: str) -> int:
+        """Sequence number of the aggregate's last event, 0 if it has none."""
+        return self._versions.get(aggregate_id, 0)
+    
+    async def fetch_outbox(self, limit: int) -> List[Tuple[int, Event]]:
+        """Get up to limit unpublished (position, event) entries, oldest first."""
+        return list(islice(self._outbox, limit))
+    
+    async def ack_outbox(self, position: int) -> None:
+        """Remove outbox entries up to and including position once published."""
+        while self._outbox and self._outbox[0][0] <= position:
+            self._outbox.popleft()
+    
     async def close(self) -> None:
         """Close event store."""
-        pass
+        self.ready = False
 
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import JSON, Float, Integer, LargeBinary, String, Text, DateTime, Index, UniqueConstraint, func
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from app.core import Base
+
+
+class Saga(Base):
+    __table_args__ = (
+        Index("ix_sagas_status", "status"),
+    )
+
+    saga_id: Mapped[str] = mapped_column(String(200), unique=True)
+    saga_type: Mapped[str] = mapped_column(String(100))
+    status: Mapped[str] = mapped_column(String(50), default="pending")
+    data: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    # Names of completed steps in completion order, the order compensation reverses.
+    completed_steps: Mapped[List[str]] = mapped_column(JSON, default=list)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Epoch seconds until which the process running the saga owns it; renewed by a
+    # heartbeat, so a running saga whose lease lapsed was left behind by a crash.
+    lease_expires_at: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class StoredEvent(Base):
+    """One event of the SQL event store; id is its position in the whole log."""
+
+    __tablename__ = "events"
+    __table_args__ = (
+        # Rejects a second writer of the same aggregate version, across processes.
+        UniqueConstraint("aggregate_id", "sequence", name="uq_events_aggregate_sequence"),
+        # Positions are never reused, even after the last event is deleted.
+        {"sqlite_autoincrement": True},
+    )
+
+    aggregate_id: Mapped[str] = mapped_column(String(200))
+    sequence: Mapped[int] = mapped_column(Integer)
+    event_type: Mapped[str] = mapped_column(String(100))
+    # The whole event encoded by the configured EventCodec.
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class OutboxOffset(Base):
+    """Position up to which a relay has published the SQL event log."""
+
+    __tablename__ = "outbox_offsets"
+
+    name: Mapped[str] = mapped_column(String(100), unique=True)
+    position: Mapped[int] = mapped_column(Integer, default=0)
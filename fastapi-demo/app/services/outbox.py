@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from app.services.event_store import EventStore, Event
+
+logger = logging.getLogger(__name__)
+
+EventBatchHandler = Callable[[List[Event]], Awaitable[None]]
+
+
+class InProcessBroker:
+    """Local stand-in for a message broker: delivers batches to subscribers in process."""
+
+    def __init__(self) -> None:
+        self._subscribers: List[EventBatchHandler] = []
+
+    def subscribe(self, handler: EventBatchHandler) -> None:
+        self._subscribers.append(handler)
+
+    async def publish_batch(self, events: List[Event]) -> None:
+        for handler in self._subscribers:
+            await handler(events)
+
+
+class OutboxRelay:
+    """Background task moving outbox entries of the event store to the broker.
+
+    Entries are acknowledged only after the broker accepted the whole batch,
+    so delivery is at least once and commands never wait for the broker.
+    """
+
+    def __init__(
+        self,
+        event_store: EventStore,
+        broker: InProcessBroker,
+        batch_size: int = 100,
+        poll_interval: float = 0.1,
+    ) -> None:
+        self.event_store: EventStore = event_store
+        self.broker: InProcessBroker = broker
+        self.batch_size: int = batch_size
+        self.poll_interval: float = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def relay_once(self) -> int:
+        """Publish one batch of pending entries; returns how many were published."""
+        entries = await self.event_store.fetch_outbox(self.batch_size)
+        if not entries:
+            return 0
+        await self.broker.publish_batch([event for _, event in entries])
+        await self.event_store.ack_outbox(entries[-1][0])
+        return len(entries)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                published = await self.relay_once()
+            except Exception:
+                logger.exception("Outbox relay failed, retrying")
+                published = 0
+            if published < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -1,5 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from app.services.event_store import EventStore, Event
+from app.services.saga_coordinator import SagaStore
 
 class QueryHandler:
     """Handler for query operations in CQRS pattern."""
@@ -12,8 +13,9 @@ class QueryHandler:
         """Get order by replaying events from event store."""
         events: List[Event] = await self.event_store.get_events(order_id)
         
-        state: Dict[str, Any] = {"id": order_id, "status": "pending"}
+        state: Dict[str, Any] = {"id": order_id, "status": "pending", "version": 0}
         for event in events:
+            state["version"] = event.sequence
             if event.event_type == "OrderCreated":
                 state.update(event.data)
                 state["status"] = "created"
@@ -27,3 +29,16 @@ class QueryHandler:
         """List orders for given user."""
         return []
 
+
+    async def get_saga(self, saga_id: str) -> Optional[Dict[str, Any]]:
+        """Get persisted saga progress, None if it does not exist."""
+        saga = await SagaStore.get(saga_id)
+        if saga is None:
+            return None
+        return {
+            "saga_id": saga.saga_id,
+            "type": saga.saga_type,
+            "status": saga.status,
+            "steps": saga.completed_steps,
+            "error": saga.error,
+        }
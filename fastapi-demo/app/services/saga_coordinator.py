@@ -1,46 +1,402 @@
-from typing import Dict, Any
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Row, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core import db, settings
 from app.services.event_store import EventStore, Event
+from app.services.models import Saga
+from app.services.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+SagaStepHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class SagaStep:
+    """One node of a saga DAG: runs once every step it depends on has completed."""
+
+    def __init__(
+        self,
+        name: str,
+        depends_on: Sequence[str] = (),
+        timeout: float = 10.0,
+        retries: int = 0,
+        retry_backoff: float = 0.1,
+    ) -> None:
+        self.name: str = name
+        self.depends_on: Sequence[str] = tuple(depends_on)
+        self.timeout: float = timeout
+        self.retries: int = retries
+        self.retry_backoff: float = retry_backoff
+
+
+class SagaStepFailed(Exception):
+    """A step still failed or timed out after all of its retries."""
+
+    def __init__(self, step: str, cause: BaseException) -> None:
+        super().__init__(f"Saga step {step} failed: {cause!r}")
+        self.step: str = step
+
+
+def validate_saga_steps(steps: Sequence[SagaStep]) -> None:
+    """Raise ValueError unless steps form a DAG over uniquely named steps."""
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate saga step names: {names}")
+    remaining = {step.name: set(step.depends_on) for step in steps}
+    for name, depends_on in remaining.items():
+        unknown = depends_on - remaining.keys()
+        if unknown:
+            raise ValueError(f"Saga step {name} depends on unknown steps {sorted(unknown)}")
+    while remaining:
+        ready = [name for name, depends_on in remaining.items() if not depends_on]
+        if not ready:
+            raise ValueError(f"Saga steps {sorted(remaining)} form a cycle")
+        for name in ready:
+            del remaining[name]
+        for depends_on in remaining.values():
+            depends_on.difference_update(ready)
+
+
+SAGA_DEFINITIONS: Dict[str, List[SagaStep]] = {
+    # Inventory and payment do not depend on each other, so they run concurrently.
+    "order_creation": [
+        SagaStep(
+            "reserve_inventory",
+            timeout=settings.saga_step_timeout,
+            retries=settings.saga_step_retries,
+        ),
+        SagaStep(
+            "charge_payment",
+            timeout=settings.saga_step_timeout,
+            retries=settings.saga_step_retries,
+        ),
+    ],
+}
+
+
+class SagaStore:
+    """Saga state in the sagas table; every call is its own short transaction.
+
+    Status transitions are conditional UPDATEs, so a saga is claimed by one
+    worker only and a compensation cannot interleave with a step being recorded.
+    """
+
+    @staticmethod
+    async def create(
+        saga_id: str,
+        saga_type: str,
+        data: Dict[str, Any],
+        status: str,
+        lease_expires_at: float | None = None,
+    ) -> bool:
+        """Insert a saga, False if one with this saga_id already exists."""
+        async with db.factory.get_session() as session:
+            session.add(Saga(
+                saga_id=saga_id,
+                saga_type=saga_type,
+                status=status,
+                data=data,
+                completed_steps=[],
+                lease_expires_at=lease_expires_at,
+            ))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+        return True
+
+    @staticmethod
+    async def get(saga_id: str) -> Saga | None:
+        async with db.factory.get_session(read_only=True) as session:
+            return await session.scalar(select(Saga).where(Saga.saga_id == saga_id))
+
+    @staticmethod
+    async def pending_ids() -> List[str]:
+        """IDs of sagas accepted for background execution but not started yet."""
+        async with db.factory.get_session() as session:
+            result = await session.scalars(
+                select(Saga.saga_id).where(Saga.status == "pending").order_by(Saga.id)
+            )
+            return list(result.all())
+
+    @staticmethod
+    async def reclaim_expired(now: float) -> List[str]:
+        """Put running sagas whose lease expired back to pending; their IDs."""
+        stmp = (
+            update(Saga)
+            .where(
+                Saga.status == "running",
+                or_(Saga.lease_expires_at.is_(None), Saga.lease_expires_at < now),
+            )
+            .values(status="pending", lease_expires_at=None)
+            .returning(Saga.saga_id)
+            .execution_options(synchronize_session=False)
+        )
+        async with db.factory.get_session() as session:
+            saga_ids = list((await session.scalars(stmp)).all())
+            await session.commit()
+        return saga_ids
+
+    @staticmethod
+    async def transition(
+        saga_id: str, from_statuses: Sequence[str], **values: Any
+    ) -> Row | None:
+        """Update a saga that is in one of from_statuses; None if it is not."""
+        stmp = (
+            update(Saga)
+            .where(Saga.saga_id == saga_id, Saga.status.in_(from_statuses))
+            .values(**values)
+            .returning(Saga.saga_type, Saga.data, Saga.completed_steps)
+            .execution_options(synchronize_session=False)
+        )
+        async with db.factory.get_session() as session:
+            row: Row | None = (await session.execute(stmp)).first()
+            await session.commit()
+        return row
+
 
 class SagaCoordinator:
-    """Coordinator for distributed transactions using Saga pattern."""
-    
-    def __init__(self, event_store: EventStore) -> None:
+    """Coordinator for distributed transactions using Saga pattern.
+
+    Sagas are declared as DAGs of steps in SAGA_DEFINITIONS; independent steps
+    run concurrently, each with its own timeout and retries. State is kept in
+    SQL, and sagas started with wait=False are driven by background workers.
+    A running saga holds a lease renewed every lease_seconds / 3; on start, sagas
+    whose lease expired (their process crashed) are resumed from their last
+    recorded step, so a step in flight during the crash runs again.
+    """
+
+    def __init__(
+        self,
+        event_store: EventStore,
+        definitions: Optional[Dict[str, List[SagaStep]]] = None,
+        lease_seconds: float = settings.saga_lease_seconds,
+    ) -> None:
         self.event_store: EventStore = event_store
-        self._sagas: Dict[str, Dict[str, Any]] = {}
-    
-    async def start_saga(self, saga_type: str, data: Dict[str, Any]) -> str:
-        """Start saga transaction: execute steps sequentially."""
+        self.lease_seconds: float = lease_seconds
+        self.definitions: Dict[str, List[SagaStep]] = definitions or SAGA_DEFINITIONS
+        for steps in self.definitions.values():
+            validate_saga_steps(steps)
+        self.step_handlers: Dict[str, SagaStepHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register_step_handler(self, step: str, handler: SagaStepHandler) -> None:
+        """Run handler(saga_id, data) as the action of every step with this name."""
+        self.step_handlers[step] = handler
+
+    async def start(self, workers: int, queue_size: int) -> None:
+        """Start background workers and queue sagas accepted or interrupted before a restart."""
+        await self.stop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._queue = queue
+        self._workers = [asyncio.create_task(self._worker(queue)) for _ in range(workers)]
+        reclaimed = await SagaStore.reclaim_expired(time.time())
+        if reclaimed:
+            logger.warning("Resuming %d saga(s) whose lease expired: %s", len(reclaimed), reclaimed)
+        for saga_id in await SagaStore.pending_ids():
+            await queue.put(saga_id)
+
+    async def stop(self) -> None:
+        """Cancel the workers; sagas they were driving go back to pending."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def start_saga(
+        self,
+        saga_type: str,
+        data: Dict[str, Any],
+        wait: bool = True,
+        uow: Optional[UnitOfWork] = None,
+    ) -> str:
+        """Start saga transaction: run it now, or queue it for the workers if wait is False.
+
+        Events of a saga run now are added to uow, the caller's unit of work.
+        A saga_id that already exists is returned as is, without running it again.
+        """
+        if saga_type not in self.definitions:
+            raise ValueError(f"Unknown saga type: {saga_type}")
         saga_id: str = f"{saga_type}_{data.get('order_id')}"
-        
-        self._sagas[saga_id] = {
-            "type": saga_type,
-            "status": "started",
-            "steps": [],
-            "data": data
-        }
-        
-        await self._execute_step(saga_id, "reserve_inventory", data)
-        await self._execute_step(saga_id, "charge_payment", data)
-        
-        self._sagas[saga_id]["status"] = "completed"
+
+        # Without running workers (e.g. no lifespan) the saga is driven inline.
+        if wait or self._queue is None:
+            if await SagaStore.create(saga_id, saga_type, data, status="running", lease_expires_at=self._lease()):
+                await self.run(saga_id, saga_type, data, uow=uow)
+        elif await SagaStore.create(saga_id, saga_type, data, status="pending"):
+            await self._queue.put(saga_id)
         return saga_id
-    
-    async def _execute_step(self, saga_id: str, step: str, data: Dict[str, Any]) -> None:
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            saga_id: str = await queue.get()
+            try:
+                claimed = await SagaStore.transition(
+                    saga_id, ("pending",), status="running", lease_expires_at=self._lease()
+                )
+                if claimed is not None:
+                    try:
+                        await self.run(saga_id, claimed.saga_type, claimed.data, claimed.completed_steps)
+                    except asyncio.CancelledError:
+                        await SagaStore.transition(saga_id, ("running",), status="pending")
+                        raise
+            except Exception:
+                logger.exception("Saga %s crashed", saga_id)
+            finally:
+                queue.task_done()
+
+    async def run(
+        self,
+        saga_id: str,
+        saga_type: str,
+        data: Dict[str, Any],
+        completed_steps: Sequence[str] = (),
+        uow: Optional[UnitOfWork] = None,
+    ) -> None:
+        """Drive a running saga to the end, compensating completed steps if one fails.
+
+        Without a uow, the events of the run are appended in one batch when it ends.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(saga_id))
+        try:
+            if uow is not None:
+                await self._drive(saga_id, saga_type, data, completed_steps, uow)
+                return
+            uow = UnitOfWork(self.event_store)
+            try:
+                await self._drive(saga_id, saga_type, data, completed_steps, uow)
+            finally:
+                # Steps recorded as completed keep their events even if the run is interrupted.
+                await uow.commit()
+        finally:
+            await self._cancel([heartbeat])
+
+    def _lease(self) -> float:
+        return time.time() + self.lease_seconds
+
+    async def _heartbeat(self, saga_id: str) -> None:
+        """Keep renewing the lease of a saga while this process drives it."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await SagaStore.transition(
+                    saga_id, ("running", "compensating"), lease_expires_at=self._lease()
+                )
+            except Exception:
+                logger.exception("Renewing the lease of saga %s failed", saga_id)
+
+    async def _drive(
+        self,
+        saga_id: str,
+        saga_type: str,
+        data: Dict[str, Any],
+        completed_steps: Sequence[str],
+        uow: UnitOfWork,
+    ) -> None:
+        pending: Dict[str, SagaStep] = {
+            step.name: step for step in self.definitions[saga_type]
+            if step.name not in completed_steps
+        }
+        completed: List[str] = list(completed_steps)
+        # Steps known to the sagas table; a concurrent compensate() only undoes these.
+        recorded: List[str] = list(completed_steps)
+        running: Dict[asyncio.Task, SagaStep] = {}
+        try:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if all(dependency in completed for dependency in step.depends_on):
+                        del pending[name]
+                        running[asyncio.create_task(self._run_step(saga_id, step, data, uow))] = step
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                failure: Optional[BaseException] = None
+                for task in done:
+                    step = running.pop(task)
+                    if task.exception() is None:
+                        completed.append(step.name)
+                    elif failure is None:
+                        failure = task.exception()
+
+                if failure is not None:
+                    await self._cancel(running)
+                    if await SagaStore.transition(
+                        saga_id, ("running",), status="compensating", completed_steps=completed
+                    ) is None:
+                        await self._compensate_steps(saga_id, self._unrecorded(completed, recorded), uow)
+                        return
+                    await self._compensate_steps(saga_id, reversed(completed), uow)
+                    await SagaStore.transition(
+                        saga_id, ("compensating",), status="failed", error=str(failure)
+                    )
+                    return
+
+                if await SagaStore.transition(saga_id, ("running",), completed_steps=completed) is None:
+                    # Compensated meanwhile: undo the steps that finished after it started.
+                    await self._compensate_steps(saga_id, self._unrecorded(completed, recorded), uow)
+                    return
+                recorded = list(completed)
+        finally:
+            await self._cancel(running)
+
+        await SagaStore.transition(saga_id, ("running",), status="completed")
+
+    @staticmethod
+    def _unrecorded(completed: Sequence[str], recorded: Sequence[str]) -> List[str]:
+        return [name for name in reversed(completed) if name not in recorded]
+
+    @staticmethod
+    async def _cancel(tasks: Iterable[asyncio.Task]) -> None:
+        tasks = list(tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_step(
+        self, saga_id: str, step: SagaStep, data: Dict[str, Any], uow: UnitOfWork
+    ) -> None:
+        """Run one step under its timeout, retrying with exponential backoff."""
+        for attempt in range(step.retries + 1):
+            try:
+                await asyncio.wait_for(
+                    self._execute_step(saga_id, step.name, data, uow), timeout=step.timeout
+                )
+                return
+            except Exception as error:
+                if attempt == step.retries:
+                    raise SagaStepFailed(step.name, error) from error
+                await asyncio.sleep(step.retry_backoff * 2 ** attempt)
+
+    async def _execute_step(
+        self, saga_id: str, step: str, data: Dict[str, Any], uow: UnitOfWork
+    ) -> None:
         """Execute single saga step and record event."""
-        event: Event = Event("SagaStepExecuted", saga_id, {"step": step, "data": data})
-        await self.event_store.append(event)
-        self._sagas[saga_id]["steps"].append(step)
-    
-    async def compensate(self, saga_type: str, aggregate_id: str) -> None:
-        """Compensate saga: rollback steps in reverse order."""
+        handler = self.step_handlers.get(step)
+        if handler is not None:
+            await handler(saga_id, data)
+        uow.add(Event("SagaStepExecuted", saga_id, {"step": step, "data": data}))
+
+    async def compensate(self, saga_type: str, aggregate_id: str, uow: UnitOfWork) -> None:
+        """Compensate saga: rollback completed steps in reverse order."""
         saga_id: str = f"{saga_type}_{aggregate_id}"
-        if saga_id in self._sagas:
-            for step in reversed(self._sagas[saga_id]["steps"]):
-                await self._compensate_step(saga_id, step)
-            self._sagas[saga_id]["status"] = "compensated"
-    
-    async def _compensate_step(self, saga_id: str, step: str) -> None:
-        """Compensate single saga step."""
-        event: Event = Event("SagaStepCompensated", saga_id, {"step": step})
-        await self.event_store.append(event)
+        saga = await SagaStore.transition(
+            saga_id, ("pending", "running", "completed"), status="compensating"
+        )
+        if saga is not None:
+            await self._compensate_steps(saga_id, reversed(saga.completed_steps), uow)
+            await SagaStore.transition(saga_id, ("compensating",), status="compensated")
+
+    async def _compensate_steps(self, saga_id: str, steps: Iterable[str], uow: UnitOfWork) -> None:
+        for step in steps:
+            await self._compensate_step(saga_id, step, uow)
 
+    async def _compensate_step(self, saga_id: str, step: str, uow: UnitOfWork) -> None:
+        """Compensate single saga step."""
+        uow.add(Event("SagaStepCompensated", saga_id, {"step": step}))
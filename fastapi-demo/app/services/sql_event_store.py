@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from dataclasses import replace
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Row, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import db
+from app.services.codecs import EventCodec
+from app.services.event_store import ConcurrencyError, Event, EventStore
+from app.services.models import OutboxOffset, StoredEvent
+
+logger = logging.getLogger(__name__)
+
+# Serializes appends on PostgreSQL so positions become visible in order and
+# readers following the log by position never skip a late commit.
+_APPEND_LOCK_KEY = 4_701_047
+
+_RELAY_OFFSET = "outbox"
+
+
+class SqlEventStore(EventStore):
+    """Event store in the events table, shared by every process using the database.
+
+    Events are stored as codec-encoded payloads next to the columns they are
+    looked up by. Version checks read the stream inside the append, and the
+    unique (aggregate_id, sequence) constraint rejects a writer that raced
+    past them from another process. Listeners are fed by following the log
+    from initialize(), so they also see events appended by other processes.
+    The outbox is the log after a shared relay offset: delivery is at least
+    once when relays of several processes overlap.
+    """
+
+    def __init__(self, codec: EventCodec, poll_interval: float = 0.1) -> None:
+        super().__init__()
+        self.codec: EventCodec = codec
+        self.poll_interval: float = poll_interval
+        self._listened_position: int = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        """Start following the log for listeners from its current end."""
+        self._listened_position = await self.get_position()
+        self._task = asyncio.create_task(self._follow())
+        self.ready = True
+
+    async def close(self) -> None:
+        self.ready = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _follow(self) -> None:
+        while True:
+            try:
+                events = await self.read_all(after=self._listened_position, limit=1000)
+            except Exception:
+                logger.exception("Reading the event log failed, retrying")
+                events = []
+            if events:
+                self._listened_position = events[-1].position
+                for listener in self._listeners:
+                    listener(events)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    def _decode(self, row: Row) -> Event:
+        return replace(self.codec.decode(row.payload), sequence=row.sequence, position=row.id)
+
+    @staticmethod
+    async def _read_versions(session: AsyncSession, aggregate_ids: Iterable[str]) -> Dict[str, int]:
+        stmp = (
+            select(StoredEvent.aggregate_id, func.max(StoredEvent.sequence))
+            .where(StoredEvent.aggregate_id.in_(list(aggregate_ids)))
+            .group_by(StoredEvent.aggregate_id)
+        )
+        return dict((await session.execute(stmp)).all())
+
+    async def append_batch(
+        self, events: List[Event], expected_versions: Optional[Mapping[str, int]] = None
+    ) -> None:
+        """Append events in one transaction, checking expected_versions first."""
+        expected_versions = expected_versions or {}
+        if not events:
+            return
+        aggregate_ids = {event.aggregate_id for event in events} | set(expected_versions)
+
+        async with db.factory.get_session() as session:
+            if session.bind.dialect.name == "postgresql":
+                await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _APPEND_LOCK_KEY})
+            read_versions = await self._read_versions(session, aggregate_ids)
+            for aggregate_id, expected_version in expected_versions.items():
+                actual_version = read_versions.get(aggregate_id, 0)
+                if actual_version != expected_version:
+                    raise ConcurrencyError(aggregate_id, expected_version, actual_version)
+
+            versions = dict(read_versions)
+            rows = []
+            for event in events:
+                sequence = versions.get(event.aggregate_id, 0) + 1
+                versions[event.aggregate_id] = sequence
+                rows.append({
+                    "aggregate_id": event.aggregate_id,
+                    "sequence": sequence,
+                    "event_type": event.event_type,
+                    "payload": self.codec.encode(replace(event, sequence=sequence)),
+                })
+            try:
+                await session.execute(insert(StoredEvent), rows)
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                # Another process appended to one of the aggregates in between.
+                current_versions = await self._read_versions(session, aggregate_ids)
+                for aggregate_id in aggregate_ids:
+                    if current_versions.get(aggregate_id, 0) != read_versions.get(aggregate_id, 0):
+                        raise ConcurrencyError(
+                            aggregate_id,
+                            read_versions.get(aggregate_id, 0),
+                            current_versions.get(aggregate_id, 0),
+                        ) from None
+                raise
+
+    async def get_events(self, aggregate_id: str) -> List[Event]:
+        stmp = (
+            select(StoredEvent.id, StoredEvent.sequence, StoredEvent.payload)
+            .where(StoredEvent.aggregate_id == aggregate_id)
+            .order_by(StoredEvent.sequence)
+        )
+        async with db.factory.get_session() as session:
+            return [self._decode(row) for row in await session.execute(stmp)]
+
+    async def read_all(self, after: int = 0, limit: int = 1000) -> List[Event]:
+        stmp = (
+            select(StoredEvent.id, StoredEvent.sequence, StoredEvent.payload)
+            .where(StoredEvent.id > after)
+            .order_by(StoredEvent.id)
+            .limit(limit)
+        )
+        async with db.factory.get_session() as session:
+            return [self._decode(row) for row in await session.execute(stmp)]
+
+    async def get_position(self) -> int:
+        async with db.factory.get_session() as session:
+            return await session.scalar(select(func.coalesce(func.max(StoredEvent.id), 0)))
+
+    async def get_version(self, aggregate_id: str) -> int:
+        stmp = select(func.coalesce(func.max(StoredEvent.sequence), 0)).where(
+            StoredEvent.aggregate_id == aggregate_id
+        )
+        async with db.factory.get_session() as session:
+            return await session.scalar(stmp)
+
+    async def fetch_outbox(self, limit: int) -> List[Tuple[int, Event]]:
+        async with db.factory.get_session() as session:
+            offset = await session.scalar(
+                select(OutboxOffset.position).where(OutboxOffset.name == _RELAY_OFFSET)
+            )
+        events = await self.read_all(after=offset or 0, limit=limit)
+        return [(event.position, event) for event in events]
+
+    async def ack_outbox(self, position: int) -> None:
+        stmp = (
+            update(OutboxOffset)
+            .where(OutboxOffset.name == _RELAY_OFFSET, OutboxOffset.position < position)
+            .values(position=position)
+        )
+        exists = select(OutboxOffset.id).where(OutboxOffset.name == _RELAY_OFFSET)
+        async with db.factory.get_session() as session:
+            if (await session.execute(stmp)).rowcount == 0 and await session.scalar(exists) is None:
+                session.add(OutboxOffset(name=_RELAY_OFFSET, position=position))
+                try:
+                    await session.commit()
+                    return
+                except IntegrityError:
+                    # Another relay created the offset meanwhile; advance that one.
+                    await session.rollback()
+                    await session.execute(stmp)
+            await session.commit()
@@ -0,0 +1,52 @@
+from types import TracebackType
+from typing import Dict, List, Optional, Type
+
+from app.services.event_store import EventStore, Event
+
+
+class UnitOfWork:
+    """Collects the events of one command and appends them in a single batch.
+
+    Used as an async context manager: the events are committed when the block
+    exits normally and discarded when it raises. Commit raises ConcurrencyError
+    if an aggregate registered with expect() was written to in the meantime.
+    """
+
+    def __init__(self, event_store: EventStore) -> None:
+        self.event_store: EventStore = event_store
+        self.events: List[Event] = []
+        self.expected_versions: Dict[str, int] = {}
+
+    def expect(self, aggregate_id: str, version: int) -> None:
+        """Require aggregate_id to still be at version when committing."""
+        self.expected_versions[aggregate_id] = version
+
+    def add(self, event: Event) -> None:
+        """Stage event for the next commit."""
+        self.events.append(event)
+
+    async def commit(self) -> None:
+        """Append all staged events atomically."""
+        if self.events:
+            events, self.events = self.events, []
+            expected_versions, self.expected_versions = self.expected_versions, {}
+            await self.event_store.append_batch(events, expected_versions)
+
+    def rollback(self) -> None:
+        """Drop all staged events."""
+        self.events = []
+        self.expected_versions = {}
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            self.rollback()
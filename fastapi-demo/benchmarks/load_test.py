@@ -0,0 +1,343 @@
+"""
+Load test for the REST, GraphQL and CQRS endpoints.
+
+Starts the app under uvicorn (SQLite by default, or Postgres from the
+POSTGRES_* variables with --db postgres), seeds orders, then drives a weighted
+mix of endpoints from concurrent async clients and reports throughput and
+p50/p95/p99 latency per endpoint.
+
+Run:
+    python benchmarks/load_test.py --duration 30 --concurrency 64
+    python benchmarks/load_test.py --save benchmarks/baseline.json
+    python benchmarks/load_test.py --compare benchmarks/baseline.json
+    python benchmarks/load_test.py --url http://localhost:8000   # running server
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = (
+    "rest_get_order=30,rest_user_orders=15,rest_page=5,rest_create=5,"
+    "graphql_get_order=15,graphql_user_orders=10,cqrs_create=5,cqrs_get_order=15"
+)
+
+GET_ORDER_QUERY = """
+query GetOrderById($orderId: String!) {
+    getOrderById(orderId: $orderId) { orderId userId amount status }
+}
+"""
+
+USER_ORDERS_QUERY = """
+query GetOrdersByUserId($userId: String!) {
+    getOrdersByUserId(userId: $userId) { orderId amount status }
+}
+"""
+
+
+class Context:
+    """Seeded data shared by all clients of one run."""
+
+    def __init__(self, orders: int, users: int, seed: int) -> None:
+        self.run_id: str = uuid.uuid4().hex[:8]
+        self.orders: int = orders
+        self.users: int = users
+        self.random: random.Random = random.Random(seed)
+
+    def order_id(self) -> str:
+        return f"load-{self.run_id}-{self.random.randrange(self.orders)}"
+
+    def user_id(self) -> str:
+        return f"load-user-{self.run_id}-{self.random.randrange(self.users)}"
+
+    def new_order_id(self) -> str:
+        return f"load-{self.run_id}-new-{uuid.uuid4().hex}"
+
+
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "rest_get_order": lambda client, ctx: client.get(f"/rest/orders/{ctx.order_id()}"),
+    "rest_user_orders": lambda client, ctx: client.get("/rest/orders/", params={"user_id": ctx.user_id()}),
+    "rest_page": lambda client, ctx: client.get("/rest/orders/all", params={"limit": 100}),
+    "rest_create": lambda client, ctx: client.post("/rest/orders/", json={
+        "order_id": ctx.new_order_id(), "user_id": ctx.user_id(), "amount": 10.0,
+    }),
+    "graphql_get_order": lambda client, ctx: client.post("/graphql", json={
+        "query": GET_ORDER_QUERY, "variables": {"orderId": ctx.order_id()},
+    }),
+    "graphql_user_orders": lambda client, ctx: client.post("/graphql", json={
+        "query": USER_ORDERS_QUERY, "variables": {"userId": ctx.user_id()},
+    }),
+    "cqrs_create": lambda client, ctx: client.post("/api/v1/orders", json={
+        "id": ctx.new_order_id(), "user_id": ctx.user_id(), "amount": 10.0,
+    }),
+    "cqrs_get_order": lambda client, ctx: client.get(f"/api/v1/orders/{ctx.order_id()}"),
+}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights: Dict[str, int] = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}, choose from {sorted(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def start_server(db: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    if db == "sqlite":
+        env["DB_TYPE"] = "sqlite"
+        env["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="load-test-"), "load.db")
+    else:
+        env["DB_TYPE"] = "postgres"
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=APP_DIR,
+        env=env,
+    )
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not become healthy in {timeout}s")
+
+
+async def seed(client: httpx.AsyncClient, ctx: Context) -> None:
+    """Create ctx.orders orders over REST bulk and the CQRS event store."""
+    rows = [
+        {
+            "order_id": f"load-{ctx.run_id}-{i}",
+            "user_id": f"load-user-{ctx.run_id}-{i % ctx.users}",
+            "amount": 10.0 + i % 100,
+        }
+        for i in range(ctx.orders)
+    ]
+    for start in range(0, len(rows), 1000):
+        response = await client.post("/rest/orders/bulk", json=rows[start:start + 1000])
+        response.raise_for_status()
+    # Seed CQRS orders with a bounded number of requests in flight.
+    semaphore = asyncio.Semaphore(32)
+
+    async def create(row: Dict[str, Any]) -> None:
+        async with semaphore:
+            await client.post("/api/v1/orders", json={
+                "id": row["order_id"], "user_id": row["user_id"], "amount": row["amount"],
+            })
+
+    await asyncio.gather(*(create(row) for row in rows))
+
+
+async def run_load(
+    base_url: str,
+    weights: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    ctx: Context,
+) -> Dict[str, Any]:
+    names = list(weights)
+    weight_values = [weights[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await seed(client, ctx)
+
+        measuring = False
+
+        async def worker(stop_at: float) -> None:
+            while time.monotonic() < stop_at:
+                name = ctx.random.choices(names, weights=weight_values)[0]
+                start = time.perf_counter()
+                try:
+                    response = await SCENARIOS[name](client, ctx)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                elapsed = time.perf_counter() - start
+                if measuring:
+                    latencies[name].append(elapsed)
+                    errors[name] += failed
+
+        if warmup > 0:
+            await asyncio.gather(*(worker(time.monotonic() + warmup) for _ in range(concurrency)))
+
+        measuring = True
+        started = time.monotonic()
+        await asyncio.gather(*(worker(started + duration) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    endpoints = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "total": summarize(everything, sum(errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    header = f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for name, stats in rows:
+        print(
+            f"{name:<22}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (a fraction) against a saved baseline."""
+    regressions: List[str] = []
+    current = dict(results["endpoints"], TOTAL=results["total"])
+    previous = dict(baseline["endpoints"], TOTAL=baseline["total"])
+    print(f"\nCompared with baseline {baseline.get('commit') or '?'}:")
+    for name in current:
+        if name not in previous:
+            continue
+        now, before = current[name], previous[name]
+        p95_change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (now["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        print(f"  {name:<22} p95 {p95_change:+.1%}  rps {rps_change:+.1%}")
+        if p95_change > tolerance:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms")
+        if rps_change < -tolerance:
+            regressions.append(f"{name}: rps {before['rps']:.1f} -> {now['rps']:.1f}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--orders", type=int, default=2000, help="orders to seed")
+    parser.add_argument("--users", type=int, default=200, help="users to spread them over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="compare with a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression fraction")
+    parser.add_argument("--target-rps", type=float, default=2000.0)
+    parser.add_argument("--target-p95-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = start_server(args.db, args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_healthy(base_url))
+        results = asyncio.run(run_load(
+            base_url, weights, args.concurrency, args.duration, args.warmup,
+            Context(orders=args.orders, users=args.users, seed=args.seed),
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    results.update({
+        "commit": git_commit(),
+        "db": args.db if args.url is None else None,
+        "config": {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": weights,
+            "orders": args.orders,
+        },
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    })
+    print_report(results)
+
+    total = results["total"]
+    meets_target = total["rps"] >= args.target_rps and total["p95_ms"] < args.target_p95_ms
+    print(
+        f"\nTarget {args.target_rps:.0f}+ RPS with p95 < {args.target_p95_ms:.0f}ms: "
+        f"{'met' if meets_target else 'not met'}"
+    )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2))
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Operational commands for the application.
+
+Run:
+    python cli.py migrate                 # create missing tables, then exit
+    python cli.py boot-report --runs 5    # import and startup time of main:app
+    python cli.py export orders.parquet   # stream orders to CSV or Parquet
+
+With DB_CREATE_ALL=False the app no longer touches the schema on startup, so
+`migrate` runs once per deploy (e.g. as an init container) instead of on
+every pod start.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Imports main and runs its lifespan up to the point where the app serves,
+# in a fresh interpreter so nothing is already imported or cached.
+_BOOT_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot() -> float:
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({"import": imported - started, "startup": ready - imported}))
+"""
+
+
+def migrate(args: argparse.Namespace) -> int:
+    # Imported here so that other commands do not pay for the app imports.
+    from app.core import db
+    from app.core.models import Base
+    from app.order.models import Order  # noqa: F401  registers the table
+    from app.services.models import Saga  # noqa: F401  registers the table
+
+    from app.core import settings
+    from app.order.dals import OrderDAL
+
+    async def create_all() -> None:
+        db.factory.ensure_sqlite_directory()
+        try:
+            async with db.factory.async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            if settings.order_summary_enabled:
+                # Catches up on writes made while the summary was not maintained.
+                async with db.factory.get_session() as session:
+                    await OrderDAL.rebuild_summary(session=session)
+        finally:
+            await db.factory.async_engine.dispose()
+
+    asyncio.run(create_all())
+    print(f"Schema is up to date: {', '.join(sorted(Base.metadata.tables))}")
+    if settings.order_summary_enabled:
+        print("Order summary rebuilt")
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    from app.core import db
+    from app.core import export as export_formats
+    from app.order.services import OrderService
+
+    format = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    if format == "parquet" and export_formats.pq is None:
+        print("Parquet export requires pyarrow: pip install pyarrow", file=sys.stderr)
+        return 1
+
+    async def write(file: BinaryIO) -> int:
+        written = 0
+        try:
+            async with db.factory.get_session(read_only=True) as session:
+                async for chunk in OrderService.export(
+                    session=session, format=format, user_id=args.user_id,
+                    status=args.status, batch_size=args.batch_size,
+                ):
+                    file.write(chunk)
+                    written += len(chunk)
+        finally:
+            for engine in (db.factory.async_engine, *db.factory.replica_engines):
+                await engine.dispose()
+        return written
+
+    if args.output == "-":
+        asyncio.run(write(sys.stdout.buffer))
+        return 0
+    with open(args.output, "wb") as file:
+        written = asyncio.run(write(file))
+    print(f"Exported orders to {args.output} ({format}, {written} bytes)", file=sys.stderr)
+    return 0
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, float, float]]:
+    """(module, self ms, cumulative ms) from the output of python -X importtime."""
+    modules: List[Tuple[str, float, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return modules
+
+
+def _run_probe(*python_options: str) -> Tuple[Dict[str, float], str]:
+    process = subprocess.run(
+        [sys.executable, *python_options, "-c", _BOOT_PROBE],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1]), process.stderr
+
+
+def boot_report(args: argparse.Namespace) -> int:
+    timings = [_run_probe()[0] for _ in range(args.runs)]
+    # A separate run: -X importtime itself slows imports down.
+    _, stderr = _run_probe("-X", "importtime")
+    modules = parse_importtime(stderr)
+
+    rows = [
+        ("import main", [t["import"] for t in timings]),
+        ("startup (lifespan)", [t["startup"] for t in timings]),
+        ("time to ready", [t["import"] + t["startup"] for t in timings]),
+    ]
+    print(f"Boot time over {args.runs} run(s):")
+    for label, values in rows:
+        print(f"  {label:<20} median {statistics.median(values) * 1000:7.1f} ms"
+              f"   min {min(values) * 1000:7.1f} ms")
+
+    print(f"\nSlowest imports by self time (top {args.top}):")
+    for name, self_ms, cumulative_ms in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_ms:7.1f} ms  (cumulative {cumulative_ms:7.1f} ms)  {name}")
+
+    own = [m for m in modules if m[0] == "main" or m[0].split(".")[0] == "app"]
+    print(f"\nApplication modules: {sum(m[1] for m in own):.1f} ms self time")
+    for name, self_ms, cumulative_ms in sorted(own, key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_ms:7.1f} ms  (cumulative {cumulative_ms:7.1f} ms)  {name}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="Create missing tables in the configured database")
+
+    exporter = commands.add_parser("export", help="Stream the orders table to a CSV or Parquet file")
+    exporter.add_argument("output", help="File to write, or - for standard output")
+    exporter.add_argument("--format", choices=("csv", "parquet"), help="Defaults to the output file extension")
+    exporter.add_argument("--user-id", help="Only orders of this user")
+    exporter.add_argument("--status", help="Only orders with this status")
+    exporter.add_argument("--batch-size", type=int, default=10_000, help="Rows per CSV chunk / Parquet row group")
+
+    report = commands.add_parser("boot-report", help="Measure import and startup time of main:app")
+    report.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time")
+    report.add_argument("--top", type=int, default=15, help="Modules to list")
+
+    args = parser.parse_args()
+    handlers = {"migrate": migrate, "export": export, "boot-report": boot_report}
+    return handlers[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,95 @@
 from typing import Dict, Any, AsyncGenerator
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-from app.dependencies import get_event_store
+from app.dependencies import get_event_store, get_command_handler, get_outbox_relay
+from app.dependencies import get_admission_controller, get_idempotency_store
 from app.api import commands, queries
 from app.core import settings
 from app.core.urls import main_router, graphql_app
 from app.core.db import factory
+from app.core.admission import AdmissionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.probes import check_readiness, warm_up
 from app.core.models import Base
 from app.order.models import Order
+from app.services.models import Saga
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """Application lifespan: initialize DB and event store on startup."""
-    async with factory.async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Application lifespan: initialize DB and event store, then warm up before serving."""
+    app.state.warmed_up = False
+    factory.ensure_sqlite_directory()
+    if settings.db_create_all:
+        async with factory.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
     
     await get_event_store().initialize()
+    saga_coordinator = get_command_handler().saga_coordinator
+    await saga_coordinator.start(workers=settings.saga_workers, queue_size=settings.saga_queue_size)
+    get_outbox_relay().start()
+    loop_monitor = get_admission_controller().loop_monitor
+    loop_monitor.start()
+    await warm_up(factory, pool_connections=settings.warmup_pool_connections)
+    app.state.warmed_up = True
     yield
+    await loop_monitor.stop()
+    await get_outbox_relay().stop()
+    await saga_coordinator.stop()
     await get_event_store().close()
 
 app = FastAPI(title="Production API", lifespan=lifespan, debug=settings.DEBUG)
+# Middleware added later wraps the earlier ones: metrics, then admission, then idempotency.
+app.add_middleware(
+    IdempotencyMiddleware,
+    get_store=get_idempotency_store,
+    routes=(("POST", "/api/v1/orders"), ("POST", "/rest/orders/")),
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    get_controller=get_admission_controller,
+    paths=settings.admission_path_prefixes,
+    exempt_paths=settings.admission_exempt_path_prefixes,
+    key_header=settings.rate_limit_key_header,
+)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/health")
 async def health() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/livez")
+async def livez() -> Dict[str, str]:
+    """Liveness probe: the process and its event loop respond."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness probe: warmed up, event store loaded, pool headroom and DB reachable."""
+    ready, checks = await check_readiness(
+        factory,
+        get_event_store(),
+        warmed_up=getattr(request.app.state, "warmed_up", False),
+        timeout=settings.readiness_timeout,
+        min_pool_headroom=settings.readiness_min_pool_headroom,
+    )
+    return JSONResponse(
+        {"status": "ready" if ready else "not ready", "checks": checks},
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/metrics/pool")
+async def pool_metrics() -> Dict[str, Any]:
+    """Connection pool occupancy and checkout wait metrics."""
+    return factory.pool_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Request, DB query and connection pool metrics in Prometheus text format."""
+    return PlainTextResponse(render_metrics(factory.pool_status()), media_type=CONTENT_TYPE)
+
 @app.get("/")
 async def root() -> Dict[str, str]:
     """Root endpoint."""
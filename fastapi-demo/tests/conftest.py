@@ -25,6 +25,7 @@ def setup_test_db(monkeypatch):
     _test_db = DB(url=test_db_url, echo=False)
     
     from app.order.models import Order
+    from app.services.models import Saga
     
     async def create_tables():
         async with _test_db.async_engine.begin() as conn:
@@ -49,6 +50,15 @@ def setup_test_db(monkeypatch):
         if module_name in sys.modules:
             importlib.reload(sys.modules[module_name])
     
+    # Fresh event store and handlers per test, like the database.
+    import app.dependencies as dependencies_module
+    for singleton in (
+        "_event_store", "_command_handler", "_query_handler",
+        "_broker", "_outbox_relay", "_broadcaster", "_admission_controller",
+        "_idempotency_store",
+    ):
+        monkeypatch.setattr(dependencies_module, singleton, None)
+    
     yield
     
     async def cleanup():
@@ -0,0 +1,116 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.core.admission as admission
+import app.dependencies as dependencies
+from app.core import settings
+from app.core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    ConcurrencyLimiter,
+    InMemoryRateLimiter,
+    LoopLagMonitor,
+)
+
+
+class TestAdmissionEndpoints:
+    def test_rate_limit_per_client(self, client, monkeypatch, test_order_data):
+        monkeypatch.setattr(settings, "rate_limit_per_second", 0.5)
+        monkeypatch.setattr(settings, "rate_limit_burst", 2)
+        url = f"/rest/orders/{test_order_data['order_id']}"
+
+        assert client.get(url).status_code == 404
+        assert client.get(url).status_code == 404
+        response = client.get(url)
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+        # Other paths are not admission controlled.
+        assert client.get("/health").status_code == 200
+
+    def test_rate_limit_key_header(self):
+        controller = AdmissionController(rate_limiter=InMemoryRateLimiter(rate=0.5, burst=1))
+        app = AdmissionMiddleware(FastAPI(), get_controller=lambda: controller, key_header="X-API-Key")
+        client = TestClient(app)
+
+        assert client.get("/missing", headers={"X-API-Key": "a"}).status_code == 404
+        assert client.get("/missing", headers={"X-API-Key": "b"}).status_code == 404
+        assert client.get("/missing", headers={"X-API-Key": "a"}).status_code == 429
+
+    def test_sheds_load_when_pool_is_saturated(self, client, monkeypatch):
+        controller = AdmissionController(
+            pool_status=lambda: {"primary": {"waiting": 3}, "replicas": []},
+            max_pool_waiting=3,
+            retry_after=5,
+        )
+        monkeypatch.setattr(dependencies, "_admission_controller", controller)
+
+        response = client.get("/rest/orders/missing")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+    def test_sheds_load_when_event_loop_lags(self, client, monkeypatch):
+        monitor = LoopLagMonitor()
+        monitor.lag = 0.8
+        controller = AdmissionController(loop_monitor=monitor, max_loop_lag=0.5)
+        monkeypatch.setattr(dependencies, "_admission_controller", controller)
+
+        assert client.post("/graphql", json={"query": "{ __typename }"}).status_code == 503
+        monitor.lag = 0.0
+        assert client.post("/graphql", json={"query": "{ __typename }"}).status_code == 200
+
+    def test_event_stream_is_exempt(self, client, monkeypatch):
+        monitor = LoopLagMonitor()
+        monitor.lag = 10.0
+        controller = AdmissionController(loop_monitor=monitor, max_loop_lag=0.5)
+        monkeypatch.setattr(dependencies, "_admission_controller", controller)
+
+        assert client.get("/api/v1/events?follow=false").status_code == 200
+
+
+class TestAdmissionPrimitives:
+    def test_token_bucket_refills(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+        limiter = InMemoryRateLimiter(rate=2.0, burst=1)
+
+        async def scenario() -> None:
+            assert await limiter.acquire("client") == 0
+            assert await limiter.acquire("client") == 0.5
+            now[0] += 0.5
+            assert await limiter.acquire("client") == 0
+
+        asyncio.run(scenario())
+
+    def test_concurrency_limit_with_bounded_queue(self):
+        async def scenario() -> None:
+            limiter = ConcurrencyLimiter(limit=1, max_queued=1, queue_timeout=1.0)
+            assert await limiter.acquire()
+
+            queued = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            assert limiter.queued == 1
+            # Queue full: rejected without waiting.
+            assert await limiter.acquire() is False
+
+            limiter.release()
+            assert await queued is True
+            assert limiter.active == 1 and limiter.queued == 0
+
+            limiter.release()
+            assert limiter.active == 0
+
+        asyncio.run(scenario())
+
+    def test_queue_timeout(self):
+        async def scenario() -> None:
+            limiter = ConcurrencyLimiter(limit=1, max_queued=10, queue_timeout=0.01)
+            assert await limiter.acquire()
+            assert await limiter.acquire() is False
+            assert limiter.queued == 0
+            limiter.release()
+            assert limiter.active == 0
+
+        asyncio.run(scenario())
@@ -0,0 +1,195 @@
+"""Micro-benchmarks, excluded from the default run: `make bench`."""
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_scoped_session
+
+from app.core import db as db_module
+from app.core.db import DB, RequestSessions
+from app.core.responses import RowsJSONResponse
+from app.order.dals import OrderDAL
+from app.order.models import Order
+from app.order.schemas import OrderOutput
+from app.services.codecs import CODECS, get_codec
+from app.services.event_store import Event
+
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS = 500
+
+
+def timed(run: Callable[[], Awaitable[None]]) -> float:
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start
+
+
+def report(name: str, baseline: float, candidate: float, per: int) -> None:
+    print(
+        f"\n{name}: baseline {baseline / per * 1e6:.1f}us, "
+        f"candidate {candidate / per * 1e6:.1f}us, speedup x{baseline / candidate:.2f}"
+    )
+
+
+@pytest.mark.parametrize("resolvers", [1, 3])
+def test_request_sessions_vs_scoped_registry(resolvers):
+    db: DB = db_module.factory
+
+    async def scoped_registry() -> None:
+        for _ in range(REQUESTS):
+            for _ in range(resolvers):
+                scope = async_scoped_session(
+                    session_factory=db.async_session_factory,
+                    scopefunc=asyncio.current_task,
+                )
+                try:
+                    await scope.execute(text("SELECT 1"))
+                finally:
+                    await scope.remove()
+
+    async def request_sessions() -> None:
+        for _ in range(REQUESTS):
+            sessions = RequestSessions(db)
+            try:
+                for _ in range(resolvers):
+                    async with sessions.acquire(read_only=True) as session:
+                        await session.execute(text("SELECT 1"))
+            finally:
+                await sessions.close()
+
+    baseline = timed(scoped_registry)
+    candidate = timed(request_sessions)
+    report(f"session per request ({resolvers} resolvers)", baseline, candidate, REQUESTS)
+    assert candidate < baseline * 1.1
+
+
+def test_rows_json_vs_orm_pydantic_serialization():
+    db: DB = db_module.factory
+    rows_count = 5000
+    rounds = 20
+    adapter = TypeAdapter(List[OrderOutput])
+
+    async def seed() -> None:
+        async with db.get_session() as session:
+            await OrderDAL.create_many(session=session, rows=[
+                {"order_id": f"order-{i:05d}", "user_id": "user-1", "amount": 1.0, "status": "pending"}
+                for i in range(rows_count)
+            ])
+
+    async def orm_pydantic() -> None:
+        for _ in range(rounds):
+            async with db.get_session(read_only=True) as session:
+                orders = (await session.scalars(select(Order).limit(rows_count))).all()
+            outputs = [
+                OrderOutput(
+                    order_id=order.order_id,
+                    user_id=order.user_id,
+                    amount=order.amount,
+                    status=order.status,
+                    version=order.version,
+                ) for order in orders
+            ]
+            adapter.dump_json(adapter.validate_python(outputs))
+
+    async def rows_orjson() -> None:
+        for _ in range(rounds):
+            async with db.get_session(read_only=True) as session:
+                rows = await OrderDAL.get_all(session=session, limit=rows_count)
+            RowsJSONResponse(rows)
+
+    asyncio.run(seed())
+    baseline = timed(orm_pydantic)
+    candidate = timed(rows_orjson)
+    report(f"list of {rows_count} orders", baseline, candidate, rounds)
+    assert candidate < baseline
+
+
+class DictEvent:
+    """The previous Event layout: a plain class with an instance __dict__."""
+
+    def __init__(self, event_type: str, aggregate_id: str, data: Dict[str, Any]) -> None:
+        self.event_type = event_type
+        self.aggregate_id = aggregate_id
+        self.data = data
+        self.timestamp = datetime.now(timezone.utc)
+        self.sequence = 0
+
+
+def allocated_per_item(build: Callable[[int], Any], count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(items) == count
+    return (after - before) / count
+
+
+def test_event_memory_per_event():
+    count = 100_000
+    # Event types arrive as fresh strings, e.g. when decoded during replay.
+    event_type = lambda: "".join(["SagaStep", "Executed"])
+
+    baseline = allocated_per_item(
+        lambda i: DictEvent(event_type(), f"saga-{i % 1000}", {"step": "reserve_inventory"}), count
+    )
+    candidate = allocated_per_item(
+        lambda i: Event(event_type(), f"saga-{i % 1000}", {"step": "reserve_inventory"}), count
+    )
+    print(f"\nmemory per event: baseline {baseline:.0f}B, candidate {candidate:.0f}B")
+    assert candidate < baseline
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_event_replay_throughput(name):
+    if name == "msgpack":
+        pytest.importorskip("msgpack")
+    codec = get_codec(name)
+    count = 100_000
+    events = [
+        Event("SagaStepExecuted", f"saga-{i % 1000}", {"step": "reserve_inventory", "amount": 9.99})
+        for i in range(count)
+    ]
+    json_payloads = [
+        json.dumps({
+            "event_type": e.event_type,
+            "aggregate_id": e.aggregate_id,
+            "data": e.data,
+            "timestamp": e.timestamp.isoformat(),
+            "sequence": e.sequence,
+        }).encode()
+        for e in events
+    ]
+    codec_payloads = [codec.encode(e) for e in events]
+
+    def replay_json() -> None:
+        for payload in json_payloads:
+            record = json.loads(payload)
+            event = DictEvent(record["event_type"], record["aggregate_id"], record["data"])
+            event.timestamp = datetime.fromisoformat(record["timestamp"])
+            event.sequence = record["sequence"]
+
+    def replay_codec() -> None:
+        for payload in codec_payloads:
+            codec.decode(payload)
+
+    start = time.perf_counter()
+    replay_json()
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    replay_codec()
+    candidate = time.perf_counter() - start
+    report(f"replay of {count} events ({name} vs json)", baseline, candidate, count)
+    print(
+        f"payload: json {sum(map(len, json_payloads)) / count:.0f}B, "
+        f"{name} {sum(map(len, codec_payloads)) / count:.0f}B"
+    )
+    assert candidate < baseline * 1.1
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import sqlite3
+
+import cli
+import main
+from app.core import db as db_module
+from app.core import settings
+from app.core.db import DB
+
+
+class TestCLI:
+    def test_migrate_creates_directory_and_tables(self, tmp_path, monkeypatch, capsys):
+        path = tmp_path / "nested" / "app.db"
+        monkeypatch.setattr(db_module, "factory", DB(url=f"sqlite+aiosqlite:///{path}"))
+
+        assert cli.migrate(argparse.Namespace()) == 0
+        tables = {
+            name for (name,) in sqlite3.connect(path).execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        assert {"orders", "sagas", "events"} <= tables
+        assert "orders" in capsys.readouterr().out
+
+    def test_startup_skips_create_all_when_disabled(self, tmp_path, monkeypatch):
+        path = tmp_path / "app.db"
+        monkeypatch.setattr(main, "factory", DB(url=f"sqlite+aiosqlite:///{path}"))
+        monkeypatch.setattr(settings, "db_create_all", False)
+        monkeypatch.setattr(main, "warm_up", lambda *args, **kwargs: asyncio.sleep(0))
+
+        async def boot() -> None:
+            async with main.app.router.lifespan_context(main.app):
+                pass
+
+        asyncio.run(boot())
+        tables = sqlite3.connect(path).execute("SELECT name FROM sqlite_master").fetchall()
+        assert tables == []
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   app.core.models\n"
+            "import time:      2500 |      40000 | main\n"
+        )
+        assert cli.parse_importtime(stderr) == [
+            ("app.core.models", 0.12, 0.12),
+            ("main", 2.5, 40.0),
+        ]
+
+    def test_export_csv(self, client, tmp_path, capsys):
+        client.post("/rest/orders/bulk", json=[
+            {"order_id": "cli-1", "user_id": "user-a", "amount": 1.0},
+            {"order_id": "cli-2", "user_id": "user-b", "amount": 2.0},
+        ])
+        output = tmp_path / "orders.csv"
+        args = argparse.Namespace(output=str(output), format=None, user_id="user-b", status=None, batch_size=1)
+
+        assert cli.export(args) == 0
+        lines = output.read_text().splitlines()
+        assert lines[0] == "order_id,user_id,amount,status,version,created_at"
+        assert [line.split(",")[0] for line in lines[1:]] == ["cli-2"]
+        assert "orders.csv (csv" in capsys.readouterr().err
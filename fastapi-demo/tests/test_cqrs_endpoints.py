@@ -1,3 +1,10 @@
+import asyncio
+import time
+
+from app.core import settings
+from app.core.db import DB
+from app.core.probes import check_readiness
+from app.services.event_store import EventStore
 from tests.conftest import client, test_order_data
 
 
@@ -7,6 +14,61 @@ class TestCQRSEndpoints:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
 
+    def test_liveness_probe(self, client):
+        response = client.get("/livez")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_not_ready_before_startup(self, client):
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        checks = response.json()["checks"]
+        assert checks["warmup"]["ok"] is False
+        assert checks["event_store"]["ok"] is False
+        assert checks["database"]["ok"] is True
+
+    def test_ready_after_warmup(self, client):
+        with client:
+            response = client.get("/readyz")
+            assert response.status_code == 200
+            body = response.json()
+            assert body["status"] == "ready"
+            assert body["checks"]["pool"]["headroom"] == 15
+
+            pool = client.get("/metrics/pool").json()["primary"]
+            # Warmup opened the pool's connections and returned them.
+            assert pool["checked_in"] == 5
+            assert pool["checked_out"] == 0
+
+    def test_not_ready_without_pool_headroom(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "readiness_min_pool_headroom", 16)
+        with client:
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            checks = response.json()["checks"]
+            assert checks["pool"]["ok"] is False
+            assert checks["database"] == {"ok": False, "error": "pool exhausted"}
+
+    def test_unbounded_pools_always_have_headroom(self, tmp_path):
+        store = EventStore()
+        store.ready = True
+        overflow_unlimited = DB(url=f"sqlite+aiosqlite:///{tmp_path / 'a.db'}", pool_size=1, max_overflow=-1)
+        unpooled = DB(url="sqlite+aiosqlite://")
+
+        async def check(db: DB) -> tuple:
+            try:
+                async with db.async_engine.connect():
+                    return await check_readiness(db, store, warmed_up=True, min_pool_headroom=1)
+            finally:
+                await db.async_engine.dispose()
+
+        ready, checks = asyncio.run(check(overflow_unlimited))
+        assert ready is True
+        assert checks["pool"]["headroom"] is None
+        ready, checks = asyncio.run(check(unpooled))
+        assert ready is True
+        assert checks["pool"] == {"ok": True}
+
     def test_root_endpoint(self, client):
         response = client.get("/")
         assert response.status_code == 200
@@ -69,3 +131,59 @@ class TestCQRSEndpoints:
         assert result["status"] == "cancelled"
         assert result["order_id"] == test_order_data["order_id"]
 
+
+    def test_create_order_command_respond_async(self, client, test_order_data):
+        data = {
+            "id": test_order_data["order_id"],
+            "user_id": test_order_data["user_id"],
+            "amount": test_order_data["amount"]
+        }
+        # Entering the client runs the lifespan, which starts the saga workers.
+        with client:
+            response = client.post("/api/v1/orders", json=data, headers={"Prefer": "respond-async"})
+            assert response.status_code == 202
+            location = response.headers["Location"]
+
+            for _ in range(100):
+                saga = client.get(location).json()
+                if saga["status"] == "completed":
+                    break
+                time.sleep(0.01)
+            assert saga["status"] == "completed"
+            assert sorted(saga["steps"]) == ["charge_payment", "reserve_inventory"]
+
+    def test_get_nonexistent_saga(self, client):
+        response = client.get("/api/v1/sagas/nonexistent")
+        assert response.status_code == 404
+
+    def test_create_existing_order_conflicts(self, client, test_order_data):
+        data = {
+            "id": test_order_data["order_id"],
+            "user_id": test_order_data["user_id"],
+            "amount": test_order_data["amount"]
+        }
+        assert client.post("/api/v1/orders", json=data).status_code == 200
+
+        response = client.post("/api/v1/orders", json=data)
+        assert response.status_code == 409
+        assert client.get(f"/api/v1/orders/{data['id']}").json()["version"] == 1
+
+    def test_event_stream_catch_up(self, client, test_order_data):
+        data = {
+            "id": test_order_data["order_id"],
+            "user_id": test_order_data["user_id"],
+            "amount": test_order_data["amount"]
+        }
+        client.post("/api/v1/orders", json=data)
+
+        response = client.get("/api/v1/events?follow=false")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        messages = [m for m in response.text.split("\n\n") if m]
+        assert len(messages) == 3
+        assert "event: OrderCreated" in messages[0]
+
+        response = client.get("/api/v1/events?follow=false", headers={"Last-Event-ID": "2"})
+        messages = [m for m in response.text.split("\n\n") if m]
+        assert len(messages) == 1
+        assert messages[0].startswith("id: 3\n")
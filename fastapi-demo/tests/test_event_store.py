@@ -0,0 +1,195 @@
+import asyncio
+from dataclasses import replace
+from typing import List
+
+import pytest
+
+from app.services.broadcaster import EventBroadcaster, stream_events
+from app.services.codecs import CODECS, EventCodec, get_codec
+from app.services.event_store import ConcurrencyError, EventStore, Event
+from app.services.sql_event_store import SqlEventStore
+
+
+class TestOptimisticConcurrency:
+    def test_events_are_numbered_per_aggregate(self):
+        store = EventStore()
+
+        async def run() -> List[Event]:
+            await store.append_batch([
+                Event("OrderCreated", "order-1", {}),
+                Event("OrderCreated", "order-2", {}),
+                Event("OrderCancelled", "order-1", {}),
+            ])
+            return await store.get_events("order-1")
+
+        assert [e.sequence for e in asyncio.run(run())] == [1, 2]
+        assert asyncio.run(store.get_version("order-2")) == 1
+
+    def test_stale_expected_version_is_rejected(self):
+        store = EventStore()
+
+        async def run() -> None:
+            await store.append(Event("OrderCreated", "order-1", {}), expected_version=0)
+            await store.append(Event("OrderCancelled", "order-1", {}), expected_version=1)
+            with pytest.raises(ConcurrencyError) as error:
+                await store.append_batch(
+                    [Event("OrderCancelled", "order-1", {}), Event("Other", "order-2", {})],
+                    expected_versions={"order-1": 1},
+                )
+            assert error.value.actual_version == 2
+
+        asyncio.run(run())
+        assert asyncio.run(store.get_version("order-1")) == 2
+        assert asyncio.run(store.get_version("order-2")) == 0
+
+
+class TestEventCodecs:
+    @pytest.mark.parametrize("name", sorted(CODECS))
+    def test_round_trip(self, name):
+        if name == "msgpack":
+            pytest.importorskip("msgpack")
+        codec = get_codec(name)
+        event = replace(
+            Event("OrderCreated", "order-1", {"amount": 9.99, "items": ["a", "b"]}), sequence=3
+        )
+
+        decoded = codec.decode(codec.encode(event))
+        assert decoded == event
+        assert decoded.event_type is event.event_type
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            get_codec("pickle")
+
+    def test_codec_must_implement_decode(self):
+        class EncodeOnly(EventCodec):
+            def encode(self, event: Event) -> bytes:
+                return b""
+
+        with pytest.raises(TypeError):
+            EncodeOnly()
+
+
+class TestEventSubscriptions:
+    def test_catch_up_then_live_events(self):
+        store = EventStore()
+        broadcaster = EventBroadcaster(buffer_size=10)
+        store.add_listener(broadcaster.publish)
+
+        async def run() -> List[int]:
+            await store.append_batch([Event("OrderCreated", f"order-{i}", {}) for i in range(3)])
+            received: List[int] = []
+            stream = stream_events(store, broadcaster, after=1, batch_size=2)
+            while len(received) < 2:
+                received.append((await stream.__anext__()).position)
+            await store.append(Event("OrderCancelled", "order-0", {}))
+            received.append((await stream.__anext__()).position)
+            await stream.aclose()
+            return received
+
+        assert asyncio.run(run()) == [2, 3, 4]
+        assert not broadcaster._subscriptions
+
+    def test_slow_subscriber_catches_up_after_overflow(self):
+        store = EventStore()
+        broadcaster = EventBroadcaster(buffer_size=2)
+        store.add_listener(broadcaster.publish)
+
+        async def run() -> List[int]:
+            stream = stream_events(store, broadcaster)
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            # Appends never wait for the subscriber, even with its buffer full.
+            for i in range(10):
+                await store.append(Event("OrderCreated", f"order-{i}", {}))
+            received = [(await first).position]
+            while len(received) < 10:
+                received.append((await stream.__anext__()).position)
+            await stream.aclose()
+            return received
+
+        assert asyncio.run(run()) == list(range(1, 11))
+
+
+class TestSqlEventStore:
+    """Two store instances on one database stand in for two worker processes."""
+
+    def test_events_round_trip_through_the_database(self):
+        store = SqlEventStore(get_codec("orjson"))
+
+        async def scenario() -> None:
+            await store.append_batch([
+                Event("OrderCreated", "order-1", {"amount": 1.5}),
+                Event("OrderCreated", "order-2", {"amount": 2.0}),
+            ])
+            await store.append(Event("OrderCancelled", "order-1", {"reason": "x"}), expected_version=1)
+
+            events = await store.get_events("order-1")
+            assert [(e.event_type, e.sequence, e.position) for e in events] == [
+                ("OrderCreated", 1, 1), ("OrderCancelled", 2, 3)
+            ]
+            assert events[0].data == {"amount": 1.5}
+            assert await store.get_version("order-1") == 2
+            assert await store.get_position() == 3
+            assert [e.position for e in await store.read_all(after=1, limit=1)] == [2]
+
+        asyncio.run(scenario())
+
+    def test_versions_are_checked_across_instances(self):
+        first = SqlEventStore(get_codec("orjson"))
+        second = SqlEventStore(get_codec("orjson"))
+
+        async def scenario() -> None:
+            await first.append(Event("OrderCreated", "order-1", {}), expected_version=0)
+            with pytest.raises(ConcurrencyError):
+                await second.append(Event("OrderCreated", "order-1", {}), expected_version=0)
+
+            # A writer that read its versions before the other one committed.
+            original = second._read_versions
+            calls = []
+
+            async def versions(session, aggregate_ids):
+                calls.append(aggregate_ids)
+                return {} if len(calls) == 1 else await original(session, aggregate_ids)
+
+            second._read_versions = versions
+            with pytest.raises(ConcurrencyError) as error:
+                await second.append(Event("OrderCancelled", "order-1", {}))
+            assert error.value.actual_version == 1
+            assert len(await first.get_events("order-1")) == 1
+
+        asyncio.run(scenario())
+
+    def test_outbox_offset_is_shared(self):
+        first = SqlEventStore(get_codec("orjson"))
+        second = SqlEventStore(get_codec("orjson"))
+
+        async def scenario() -> None:
+            await first.append_batch([Event("OrderCreated", f"order-{i}", {}) for i in range(3)])
+            entries = await first.fetch_outbox(limit=2)
+            assert [position for position, _ in entries] == [1, 2]
+            await first.ack_outbox(2)
+            assert [position for position, _ in await second.fetch_outbox(limit=10)] == [3]
+            await second.ack_outbox(3)
+            assert await first.fetch_outbox(limit=10) == []
+
+        asyncio.run(scenario())
+
+    def test_listeners_see_events_of_other_instances(self):
+        reader = SqlEventStore(get_codec("orjson"), poll_interval=0.01)
+        writer = SqlEventStore(get_codec("orjson"))
+        received: List[Event] = []
+        reader.add_listener(received.extend)
+
+        async def scenario() -> None:
+            await writer.append(Event("OrderCreated", "order-0", {}))
+            await reader.initialize()
+            await writer.append(Event("OrderCreated", "order-1", {}))
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+            await reader.close()
+
+        asyncio.run(scenario())
+        assert [(e.aggregate_id, e.position) for e in received] == [("order-1", 2)]
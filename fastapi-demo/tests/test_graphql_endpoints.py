@@ -1,3 +1,6 @@
+from sqlalchemy import event
+
+from app.core import db as db_module
 from tests.conftest import client, test_order_data
 
 
@@ -20,6 +23,107 @@ class TestGraphQLEndpoints:
         assert "getAllOrders" in data["data"]
         assert isinstance(data["data"]["getAllOrders"], list)
 
+    def test_graphql_get_all_orders_pagination(self, client):
+        for i in range(3):
+            client.post("/rest/orders", json={
+                "order_id": f"order-{i}",
+                "user_id": "user-1",
+                "amount": 10.0
+            })
+        query = """
+        query GetAllOrders($after: String, $first: Int!) {
+            getAllOrders(after: $after, first: $first) {
+                orderId
+            }
+        }
+        """
+        response = client.post(
+            "/graphql",
+            json={"query": query, "variables": {"after": "order-0", "first": 1}}
+        )
+        assert response.status_code == 200
+        orders = response.json()["data"]["getAllOrders"]
+        assert [o["orderId"] for o in orders] == ["order-1"]
+
+    def test_graphql_resolvers_share_request_session(self, client, test_order_data, monkeypatch):
+        client.post("/rest/orders", json=test_order_data)
+        opened = []
+        get_session = db_module.factory.get_session
+
+        def counting_get_session(*args, **kwargs):
+            opened.append(kwargs.get("read_only", False))
+            return get_session(*args, **kwargs)
+
+        monkeypatch.setattr(db_module.factory, "get_session", counting_get_session)
+        query = """
+        query GetOrders($orderId: String!, $userId: String!) {
+            first: getOrderById(orderId: $orderId) { orderId }
+            second: getOrderById(orderId: $orderId) { orderId }
+            byUser: getOrdersByUserId(userId: $userId) { orderId }
+            all: getAllOrders { orderId }
+        }
+        """
+        variables = {
+            "orderId": test_order_data["order_id"],
+            "userId": test_order_data["user_id"]
+        }
+        response = client.post("/graphql", json={"query": query, "variables": variables})
+        assert response.status_code == 200
+        data = response.json()
+        assert "errors" not in data
+        assert data["data"]["first"]["orderId"] == test_order_data["order_id"]
+        assert data["data"]["second"]["orderId"] == test_order_data["order_id"]
+        assert len(data["data"]["byUser"]) == 1
+        assert len(data["data"]["all"]) == 1
+        # All four resolvers read through one session opened for the request.
+        assert opened == [True]
+
+    def test_graphql_order_lookups_are_batched(self, client):
+        for i in range(3):
+            client.post("/rest/orders", json={
+                "order_id": f"order-{i}",
+                "user_id": f"user-{i}",
+                "amount": 10.0
+            })
+        query = """
+        query {
+            a: getOrderById(orderId: "order-0") { orderId }
+            b: getOrderById(orderId: "order-1") { orderId }
+            c: getOrderById(orderId: "order-2") { orderId }
+            d: getOrdersByUserId(userId: "user-0") { orderId }
+            e: getOrdersByUserId(userId: "user-1") { orderId }
+        }
+        """
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.startswith("SELECT"):
+                statements.append(statement)
+
+        engine = db_module.factory.async_engine.sync_engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = client.post("/graphql", json={"query": query})
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        data = response.json()["data"]
+        assert [data[alias]["orderId"] for alias in "abc"] == ["order-0", "order-1", "order-2"]
+        assert data["d"] == [{"orderId": "order-0"}]
+        assert len(statements) == 2
+
+    def test_graphql_get_nonexistent_order(self, client):
+        query = """
+        query {
+            getOrderById(orderId: "nonexistent-order") { orderId }
+        }
+        """
+        response = client.post("/graphql", json={"query": query})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["data"] is None
+        assert data["errors"]
+
     def test_graphql_create_order_mutation(self, client, test_order_data):
         mutation = """
         mutation CreateOrder($order: OrderCreateInputGraphQL!) {
@@ -51,6 +155,34 @@ class TestGraphQLEndpoints:
         assert order["userId"] == test_order_data["user_id"]
         assert order["status"] == "pending"
 
+    def test_graphql_create_orders_mutation(self, client, test_order_data):
+        mutation = """
+        mutation CreateOrders($orders: [OrderCreateInputGraphQL!]!) {
+            createOrders(orders: $orders) {
+                orderId
+                success
+                error
+                order {
+                    status
+                }
+            }
+        }
+        """
+        order = {
+            "orderId": test_order_data["order_id"],
+            "userId": test_order_data["user_id"],
+            "amount": test_order_data["amount"]
+        }
+        response = client.post(
+            "/graphql",
+            json={"query": mutation, "variables": {"orders": [order, order]}}
+        )
+        assert response.status_code == 200
+        results = response.json()["data"]["createOrders"]
+        assert [r["success"] for r in results] == [True, False]
+        assert results[0]["order"]["status"] == "pending"
+        assert results[1]["order"] is None
+
     def test_graphql_get_order_by_id_query(self, client, test_order_data):
         mutation = """
         mutation CreateOrder($order: OrderCreateInputGraphQL!) {
@@ -200,3 +332,28 @@ class TestGraphQLEndpoints:
         assert "data" in data
         assert data["data"]["deleteOrder"] is None
 
+    def test_graphql_order_aggregates(self, client):
+        client.post("/rest/orders/bulk", json=[
+            {"order_id": "agg-1", "user_id": "user-a", "amount": 1.5},
+            {"order_id": "agg-2", "user_id": "user-a", "amount": 2.5},
+            {"order_id": "agg-3", "user_id": "user-b", "amount": 4.0},
+        ])
+        query = """
+        query {
+            orderAggregates(groupBy: [USER_ID], bucket: DAY) {
+                userId
+                status
+                bucket
+                orderCount
+                totalAmount
+            }
+        }
+        """
+        response = client.post("/graphql", json={"query": query})
+        assert response.status_code == 200
+        aggregates = response.json()["data"]["orderAggregates"]
+        assert [(a["userId"], a["status"], a["orderCount"], a["totalAmount"]) for a in aggregates] == [
+            ("user-a", None, 2, 4.0),
+            ("user-b", None, 1, 4.0),
+        ]
+        assert aggregates[0]["bucket"].endswith("T00:00:00")
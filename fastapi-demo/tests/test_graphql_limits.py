@@ -0,0 +1,79 @@
+import hashlib
+
+from tests.conftest import client
+
+
+ALL_ORDERS_QUERY = "query { getAllOrders { orderId } }"
+
+
+def persisted_query(query_hash: str) -> dict:
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+
+
+class TestPersistedQueries:
+    def test_unknown_hash_is_not_found(self, client):
+        response = client.post(
+            "/graphql",
+            json={"extensions": persisted_query("0" * 64)}
+        )
+        assert response.status_code == 200
+        error = response.json()["errors"][0]
+        assert error["message"] == "PersistedQueryNotFound"
+        assert error["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    def test_registered_query_runs_by_hash(self, client):
+        query_hash = hashlib.sha256(ALL_ORDERS_QUERY.encode()).hexdigest()
+        register = client.post(
+            "/graphql",
+            json={"query": ALL_ORDERS_QUERY, "extensions": persisted_query(query_hash)}
+        )
+        assert register.status_code == 200
+
+        response = client.post("/graphql", json={"extensions": persisted_query(query_hash)})
+        assert response.status_code == 200
+        assert response.json()["data"] == {"getAllOrders": []}
+
+        get_response = client.get(
+            "/graphql",
+            params={"extensions": f'{{"persistedQuery": {{"version": 1, "sha256Hash": "{query_hash}"}}}}'}
+        )
+        assert get_response.status_code == 200
+        assert get_response.json()["data"] == {"getAllOrders": []}
+
+    def test_hash_mismatch_is_rejected(self, client):
+        response = client.post(
+            "/graphql",
+            json={"query": ALL_ORDERS_QUERY, "extensions": persisted_query("0" * 64)}
+        )
+        assert response.status_code == 400
+
+
+class TestQueryLimits:
+    def test_query_cost_limit(self, client):
+        query = """
+        query Expensive {
+            a: getAllOrders(first: 1000) { orderId userId amount status }
+            b: getAllOrders(first: 1000) { orderId userId amount status }
+        }
+        """
+        response = client.post("/graphql", json={"query": query})
+        errors = response.json()["errors"]
+        assert "exceeds maximum operation cost" in errors[0]["message"]
+
+    def test_negative_first_does_not_lower_the_cost(self, client):
+        query = """
+        query Expensive {
+            a: getAllOrders(first: 1000) { orderId userId amount status }
+            b: getAllOrders(first: 1000) { orderId userId amount status }
+            neg: getAllOrders(first: -100000) { orderId userId amount status }
+        }
+        """
+        response = client.post("/graphql", json={"query": query})
+        errors = response.json()["errors"]
+        assert "exceeds maximum operation cost" in errors[0]["message"]
+
+    def test_query_alias_limit(self, client):
+        aliases = " ".join(f"a{i}: __typename" for i in range(31))
+        response = client.post("/graphql", json={"query": f"query {{ {aliases} }}"})
+        errors = response.json()["errors"]
+        assert "aliases" in errors[0]["message"]
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+
+import orjson
+
+import app.core.idempotency as idempotency
+from app.core.idempotency import IdempotencyRecord, InMemoryIdempotencyStore
+from app.dependencies import get_command_handler, get_idempotency_store
+
+
+class TestIdempotencyKeys:
+    def test_cqrs_retry_is_replayed_without_running_the_command(self, client, test_order_data, monkeypatch):
+        handler = get_command_handler()
+        calls = []
+        original = handler.handle_create_order
+
+        async def counting_create(order_data, wait=True):
+            calls.append(order_data["id"])
+            return await original(order_data, wait=wait)
+
+        monkeypatch.setattr(handler, "handle_create_order", counting_create)
+        data = {
+            "id": test_order_data["order_id"],
+            "user_id": test_order_data["user_id"],
+            "amount": test_order_data["amount"],
+        }
+        headers = {"Idempotency-Key": "key-1"}
+
+        first = client.post("/api/v1/orders", json=data, headers=headers)
+        retry = client.post("/api/v1/orders", json=data, headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+        assert calls == [test_order_data["order_id"]]
+
+        # Without the key the duplicate reaches the handler and conflicts.
+        assert client.post("/api/v1/orders", json=data).status_code == 409
+
+    def test_rest_retry_returns_the_created_order(self, client, test_order_data):
+        headers = {"Idempotency-Key": "key-2"}
+
+        first = client.post("/rest/orders/", json=test_order_data, headers=headers)
+        retry = client.post("/rest/orders/", json=test_order_data, headers=headers)
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+
+    def test_key_reused_for_a_different_request(self, client, test_order_data):
+        headers = {"Idempotency-Key": "key-3"}
+        assert client.post("/rest/orders/", json=test_order_data, headers=headers).status_code == 201
+
+        other = dict(test_order_data, order_id="other-order")
+        response = client.post("/rest/orders/", json=other, headers=headers)
+        assert response.status_code == 422
+
+    def test_retry_while_first_request_runs(self, client, test_order_data):
+        body = orjson.dumps(test_order_data)
+        asyncio.run(get_idempotency_store().begin(
+            "POST /rest/orders/ key-4", hashlib.blake2b(body, digest_size=16).hexdigest()
+        ))
+
+        response = client.post(
+            "/rest/orders/",
+            content=body,
+            headers={"Idempotency-Key": "key-4", "Content-Type": "application/json"},
+        )
+        assert response.status_code == 409
+        assert response.headers["retry-after"] == "1"
+
+    def test_client_errors_are_replayed(self, client, test_order_data):
+        headers = {"Idempotency-Key": "key-5"}
+        invalid = dict(test_order_data, amount="not a number")
+        assert client.post("/rest/orders/", json=invalid, headers=headers).status_code == 422
+        # Client errors are final: the same request gets the same answer.
+        replay = client.post("/rest/orders/", json=invalid, headers=headers)
+        assert replay.status_code == 422
+        assert replay.headers["idempotent-replayed"] == "true"
+
+
+class TestInMemoryIdempotencyStore:
+    def test_records_expire(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+        store = InMemoryIdempotencyStore(ttl=10, lock_ttl=1)
+
+        async def scenario() -> None:
+            assert await store.begin("key", "a") is None
+            assert (await store.begin("key", "a")).completed is False
+            now[0] = 2.0
+            # The claim of a request that never finished has lapsed.
+            assert await store.begin("key", "a") is None
+            await store.complete("key", IdempotencyRecord("a", status_code=201, body=b"{}"))
+            now[0] = 11.0
+            assert (await store.begin("key", "a")).body == b"{}"
+            now[0] = 13.0
+            assert await store.begin("key", "a") is None
+
+        asyncio.run(scenario())
+
+    def test_abandon_releases_the_key(self):
+        store = InMemoryIdempotencyStore(ttl=10, lock_ttl=10, max_keys=1)
+
+        async def scenario() -> None:
+            assert await store.begin("first", "a") is None
+            await store.abandon("first")
+            assert await store.begin("first", "a") is None
+            # Beyond max_keys the oldest record is evicted.
+            assert await store.begin("second", "b") is None
+            assert await store.begin("first", "a") is None
+
+        asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import re
+
+from app.core.metrics import Histogram
+
+
+class TestMetrics:
+    def test_server_timing_header(self, client, test_order_data):
+        client.post("/rest/orders", json=test_order_data)
+
+        response = client.get(f"/rest/orders/{test_order_data['order_id']}")
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        match = re.match(r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=[\d.]+$', timing)
+        assert match is not None
+        assert int(match.group(1)) >= 1
+
+    def test_no_queries_without_db_access(self, client):
+        response = client.get("/health")
+        assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    def test_prometheus_endpoint(self, client, test_order_data):
+        client.post("/rest/orders", json=test_order_data)
+        client.get(f"/rest/orders/{test_order_data['order_id']}")
+        client.get("/no/such/path")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/rest/orders/{order_id}"}' in body
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+        assert 'http_request_db_queries_sum{method="POST",route="/rest/orders/"}' in body
+        assert 'http_requests_in_flight{method="GET"} 1.0' in body
+        assert 'db_pool_checkouts{engine="primary"}' in body
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency", "Test latency.", (0.1, 1.0), ("route",))
+        histogram.observe(("/a",), 0.05)
+        histogram.observe(("/a",), 0.5)
+        histogram.observe(("/a",), 5.0)
+
+        lines = histogram.render()
+        assert 'latency_bucket{route="/a",le="0.1"} 1.0' in lines
+        assert 'latency_bucket{route="/a",le="1.0"} 2.0' in lines
+        assert 'latency_bucket{route="/a",le="+Inf"} 3.0' in lines
+        assert 'latency_count{route="/a"} 3.0' in lines
+        assert 'latency_sum{route="/a"} 5.55' in lines
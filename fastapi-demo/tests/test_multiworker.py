@@ -0,0 +1,87 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent
+WORKERS = 3
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def multiworker_server(tmp_path):
+    """uvicorn with several worker processes sharing state through one SQLite file."""
+    env = dict(
+        os.environ,
+        DB_TYPE="sqlite",
+        SQLITE_PATH=str(tmp_path / "shared.db"),
+        DB_CREATE_ALL="False",
+        EVENT_STORE_BACKEND="sql",
+    )
+    subprocess.run([sys.executable, "cli.py", "migrate"], cwd=APP_DIR, env=env, check=True, capture_output=True)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(WORKERS), "--log-level", "warning",
+        ],
+        cwd=APP_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/readyz").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            assert time.monotonic() < deadline, "server did not become ready"
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+class TestMultiWorker:
+    def test_reads_are_consistent_across_workers(self, multiworker_server):
+        # No keep-alive: every request is a new connection, accepted by any worker.
+        limits = httpx.Limits(max_keepalive_connections=0)
+        with httpx.Client(base_url=multiworker_server, limits=limits, timeout=10) as client:
+            order_ids = [f"mw-order-{i}" for i in range(5)]
+            for order_id in order_ids:
+                response = client.post(
+                    "/api/v1/orders", json={"id": order_id, "user_id": "mw-user", "amount": 10.0}
+                )
+                assert response.status_code == 200
+
+            for order_id in order_ids:
+                reads = [client.get(f"/api/v1/orders/{order_id}").json() for _ in range(WORKERS * 3)]
+                assert all(read == reads[0] for read in reads)
+                assert reads[0]["status"] == "created"
+
+            # The duplicate is detected whichever worker receives it.
+            for order_id in order_ids:
+                response = client.post(
+                    "/api/v1/orders", json={"id": order_id, "user_id": "mw-user", "amount": 10.0}
+                )
+                assert response.status_code == 409
+
+            cancelled = client.post(f"/api/v1/orders/{order_ids[0]}/cancel", json={"reason": "test"})
+            assert cancelled.status_code == 200
+            reads = [client.get(f"/api/v1/orders/{order_ids[0]}").json() for _ in range(WORKERS * 3)]
+            assert {read["status"] for read in reads} == {"cancelled"}
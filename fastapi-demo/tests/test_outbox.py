@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, List, Mapping, Optional
+
+import pytest
+
+from app.services.command_handler import CommandHandler
+from app.services.event_store import ConcurrencyError, EventStore, Event
+from app.services.outbox import InProcessBroker, OutboxRelay
+from app.services.saga_coordinator import SagaStore
+from app.services.unit_of_work import UnitOfWork
+
+
+class CountingEventStore(EventStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: List[List[Event]] = []
+
+    async def append_batch(
+        self, events: List[Event], expected_versions: Optional[Mapping[str, int]] = None
+    ) -> None:
+        self.batches.append(list(events))
+        await super().append_batch(events, expected_versions)
+
+
+class TestUnitOfWork:
+    def test_order_is_committed_before_its_saga_runs(self):
+        store = CountingEventStore()
+        handler = CommandHandler(store)
+
+        asyncio.run(handler.handle_create_order({"id": "order-1", "user_id": "user-1", "amount": 1.0}))
+        assert [[e.event_type for e in batch] for batch in store.batches] == [
+            ["OrderCreated"], ["SagaStepExecuted", "SagaStepExecuted"]
+        ]
+
+    def test_lost_create_race_starts_no_saga(self, monkeypatch):
+        store = EventStore()
+        handler = CommandHandler(store)
+
+        async def run() -> Any:
+            # Another writer creates the order between the version check and the commit.
+            await store.append(Event("OrderCreated", "order-1", {}))
+            monkeypatch.setattr(store, "get_version", lambda aggregate_id: asyncio.sleep(0, 0))
+            with pytest.raises(ConcurrencyError):
+                await handler.handle_create_order({"id": "order-1", "user_id": "user-1", "amount": 1.0})
+            return await SagaStore.get("order_creation_order-1")
+
+        assert asyncio.run(run()) is None
+
+    def test_events_are_discarded_on_error(self):
+        store = EventStore()
+
+        async def fail() -> None:
+            async with UnitOfWork(store) as uow:
+                uow.add(Event("OrderCreated", "order-1", {}))
+                raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+        assert asyncio.run(store.get_events("order-1")) == []
+        assert asyncio.run(store.fetch_outbox(10)) == []
+
+
+class TestOutboxRelay:
+    def test_relay_publishes_in_batches(self):
+        store = EventStore()
+        broker = InProcessBroker()
+        batches: List[List[Event]] = []
+
+        async def collect(events: List[Event]) -> None:
+            batches.append(events)
+
+        broker.subscribe(collect)
+        relay = OutboxRelay(store, broker, batch_size=2)
+
+        async def run() -> None:
+            await store.append_batch([Event("OrderCreated", f"order-{i}", {}) for i in range(3)])
+            while await relay.relay_once():
+                pass
+
+        asyncio.run(run())
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert asyncio.run(store.fetch_outbox(10)) == []
+
+    def test_failed_publish_keeps_entries(self):
+        store = EventStore()
+        broker = InProcessBroker()
+
+        async def unavailable(events: List[Event]) -> None:
+            raise ConnectionError("broker down")
+
+        broker.subscribe(unavailable)
+        relay = OutboxRelay(store, broker)
+
+        async def run() -> None:
+            await store.append(Event("OrderCreated", "order-1", {}))
+            with pytest.raises(ConnectionError):
+                await relay.relay_once()
+
+        asyncio.run(run())
+        assert len(asyncio.run(store.fetch_outbox(10))) == 1
+
+    def test_background_relay(self):
+        store = EventStore()
+        broker = InProcessBroker()
+        published: List[Event] = []
+
+        async def collect(events: List[Event]) -> None:
+            published.extend(events)
+
+        broker.subscribe(collect)
+        relay = OutboxRelay(store, broker, poll_interval=0.01)
+
+        async def run() -> None:
+            relay.start()
+            await store.append(Event("OrderCreated", "order-1", {}))
+            for _ in range(100):
+                if published:
+                    break
+                await asyncio.sleep(0.01)
+            await relay.stop()
+
+        asyncio.run(run())
+        assert [e.aggregate_id for e in published] == ["order-1"]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import db as db_module
+from app.core.db import DB
+from app.core.models import Base
+from app.order.dals import OrderDAL
+from app.order.models import Order
+
+
+HOT_QUERIES: Dict[str, Callable[[AsyncSession], Awaitable[Any]]] = {
+    "get_by_id": lambda session: OrderDAL.get_by_id(session=session, order_id="order-1"),
+    "get_by_user_id": lambda session: OrderDAL.get_by_user_id(session=session, user_id="user-1"),
+    "get_all_page": lambda session: OrderDAL.get_all(session=session, after="order-1", limit=10),
+}
+
+
+async def capture_statements(
+    db: DB, query: Callable[[AsyncSession], Awaitable[Any]]
+) -> List[Tuple[str, Any]]:
+    captured: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(db.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        async with db.get_session() as session:
+            await query(session)
+    finally:
+        event.remove(db.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+async def sqlite_plan(db: DB, statement: str, parameters: Any) -> List[str]:
+    async with db.async_engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in result]
+
+
+async def postgres_plan(db: DB, statement: str, parameters: Any) -> List[str]:
+    async with db.async_engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+
+    node_types: List[str] = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        node_types.append(node["Node Type"])
+        nodes.extend(node.get("Plans", []))
+    return node_types
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_sqlite_hot_queries_use_indexes(name):
+    db: DB = db_module.factory
+
+    async def explain() -> List[str]:
+        details: List[str] = []
+        for statement, parameters in await capture_statements(db, HOT_QUERIES[name]):
+            details.extend(await sqlite_plan(db, statement, parameters))
+        return details
+
+    details = asyncio.run(explain())
+    assert details
+    assert not [d for d in details if d.startswith("SCAN")], details
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"),
+    reason="TEST_POSTGRES_URL is not set",
+)
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_postgres_hot_queries_use_indexes(name):
+    db = DB(url=os.environ["TEST_POSTGRES_URL"])
+
+    async def explain() -> List[str]:
+        async with db.async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Order.__table__])
+        try:
+            node_types: List[str] = []
+            for statement, parameters in await capture_statements(db, HOT_QUERIES[name]):
+                node_types.extend(await postgres_plan(db, statement, parameters))
+            return node_types
+        finally:
+            async with db.async_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=[Order.__table__])
+            await db.async_engine.dispose()
+
+    node_types = asyncio.run(explain())
+    assert node_types
+    assert "Seq Scan" not in node_types, node_types
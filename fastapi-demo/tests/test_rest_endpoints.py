@@ -1,5 +1,22 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import db, export, settings
+from app.order.dals import OrderDAL
+from app.order.schemas import OrderCreateInput
+from app.order.services import OrderService
 from tests.conftest import client, test_order_data
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install pyarrow
+    pq = None
+
 
 class TestRESTEndpoints:
     def test_get_all_orders(self, client):
@@ -61,3 +78,299 @@ class TestRESTEndpoints:
         response = client.get("/rest/orders/nonexistent-order")
         assert response.status_code == 404
 
+
+    def test_get_all_orders_keyset_pagination(self, client):
+        for i in range(5):
+            client.post("/rest/orders", json={
+                "order_id": f"order-{i}",
+                "user_id": "user-1",
+                "amount": 10.0
+            })
+
+        first_page = client.get("/rest/orders/all?limit=2")
+        assert first_page.status_code == 200
+        assert [o["order_id"] for o in first_page.json()] == ["order-0", "order-1"]
+        cursor = first_page.headers["X-Next-Cursor"]
+
+        second_page = client.get(f"/rest/orders/all?limit=2&after={cursor}")
+        assert [o["order_id"] for o in second_page.json()] == ["order-2", "order-3"]
+
+        last_page = client.get("/rest/orders/all?limit=2&after=order-3")
+        assert [o["order_id"] for o in last_page.json()] == ["order-4"]
+        assert "X-Next-Cursor" not in last_page.headers
+
+    def test_get_all_orders_stream_ndjson(self, client, test_order_data):
+        client.post("/rest/orders", json=test_order_data)
+
+        response = client.get("/rest/orders/all?stream=true")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 1
+        assert lines[0]["order_id"] == test_order_data["order_id"]
+
+    def test_stream_does_not_hold_a_request_session(self, client, test_order_data, monkeypatch):
+        client.post("/rest/orders", json=test_order_data)
+        opened = []
+        get_session = db.factory.get_session
+
+        def counting_get_session(*args, **kwargs):
+            opened.append(kwargs.get("read_only", False))
+            return get_session(*args, **kwargs)
+
+        monkeypatch.setattr(db.factory, "get_session", counting_get_session)
+        assert client.get("/rest/orders/all?stream=true").status_code == 200
+        # Only the stream's own session, not an unused one from the request.
+        assert opened == [True]
+
+        response = client.get(f"/rest/orders/all?stream=true&after={test_order_data['order_id']}")
+        assert response.status_code == 422
+
+    def test_create_orders_bulk(self, client, test_order_data):
+        client.post("/rest/orders", json=test_order_data)
+        orders = [
+            {"order_id": "bulk-1", "user_id": "user-1", "amount": 1.0},
+            {"order_id": test_order_data["order_id"], "user_id": "user-1", "amount": 2.0},
+            {"order_id": "bulk-2", "user_id": "user-1", "amount": 3.0},
+        ]
+
+        response = client.post("/rest/orders/bulk", json=orders)
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["success"] for r in results] == [True, False, True]
+        assert results[0]["order"]["status"] == "pending"
+        assert results[1]["error"]
+        assert client.get("/rest/orders/bulk-2").status_code == 200
+
+    def test_update_orders_bulk(self, client, test_order_data):
+        client.post("/rest/orders", json=test_order_data)
+        updates = [
+            {"order_id": test_order_data["order_id"], "status": "completed"},
+            {"order_id": "nonexistent-order", "status": "completed"},
+        ]
+
+        response = client.patch("/rest/orders/bulk", json=updates)
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["success"] for r in results] == [True, False]
+        assert results[0]["order"]["status"] == "completed"
+        order = client.get(f"/rest/orders/{test_order_data['order_id']}").json()
+        assert order["status"] == "completed"
+
+    def test_update_orders_bulk_duplicates(self, client, test_order_data):
+        order_id = test_order_data["order_id"]
+        client.post("/rest/orders", json=test_order_data)
+        updates = [
+            {"order_id": order_id, "status": "paid"},
+            {"order_id": order_id, "status": "cancelled"},
+        ]
+
+        results = client.patch("/rest/orders/bulk", json=updates).json()
+        assert [r["success"] for r in results] == [True, False]
+        assert results[0]["order"]["status"] == "paid"
+        assert client.get(f"/rest/orders/{order_id}").json()["status"] == "paid"
+
+    def test_update_nonexistent_order(self, client):
+        response = client.patch("/rest/orders/nonexistent-order", json={"status": "completed"})
+        assert response.status_code == 404
+
+    def test_delete_nonexistent_order(self, client):
+        response = client.delete("/rest/orders/nonexistent-order")
+        assert response.status_code == 404
+
+    def test_get_order_by_id_conditional(self, client, test_order_data):
+        order_id = test_order_data["order_id"]
+        client.post("/rest/orders", json=test_order_data)
+
+        response = client.get(f"/rest/orders/{order_id}")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"]
+
+        response = client.get(f"/rest/orders/{order_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        client.patch(f"/rest/orders/{order_id}", json={"status": "completed"})
+        response = client.get(f"/rest/orders/{order_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["version"] == 2
+
+    def test_conditional_get_after_delete_and_recreate(self, client, test_order_data):
+        order_id = test_order_data["order_id"]
+        user_id = test_order_data["user_id"]
+        client.post("/rest/orders", json=test_order_data)
+        order_etag = client.get(f"/rest/orders/{order_id}").headers["ETag"]
+        user_etag = client.get(f"/rest/orders?user_id={user_id}").headers["ETag"]
+
+        client.delete(f"/rest/orders/{order_id}")
+        client.post("/rest/orders", json=dict(test_order_data, amount=test_order_data["amount"] + 1))
+
+        response = client.get(f"/rest/orders/{order_id}", headers={"If-None-Match": order_etag})
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        assert response.json()["amount"] == test_order_data["amount"] + 1
+        response = client.get(f"/rest/orders?user_id={user_id}", headers={"If-None-Match": user_etag})
+        assert response.status_code == 200
+
+    def test_get_orders_by_user_id_conditional(self, client, test_order_data):
+        user_id = test_order_data["user_id"]
+        client.post("/rest/orders", json=test_order_data)
+
+        response = client.get(f"/rest/orders?user_id={user_id}")
+        etag = response.headers["ETag"]
+
+        response = client.get(f"/rest/orders?user_id={user_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        client.patch("/rest/orders/bulk", json=[{"order_id": test_order_data["order_id"], "status": "completed"}])
+        response = client.get(f"/rest/orders?user_id={user_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+class TestOrderExport:
+    ORDERS = [
+        {"order_id": "export-1", "user_id": "user-a", "amount": 1.5},
+        {"order_id": "export-2", "user_id": "user-a", "amount": 2.5},
+        {"order_id": "export-3", "user_id": "user-b", "amount": 3.5},
+    ]
+
+    def test_export_csv_in_batches(self, client):
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+        client.patch("/rest/orders/bulk", json=[{"order_id": "export-2", "status": "paid"}])
+
+        response = client.get("/rest/orders/export?batch_size=2")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.headers["content-disposition"] == 'attachment; filename="orders.csv"'
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["order_id"] for row in rows] == ["export-1", "export-2", "export-3"]
+        assert list(rows[0]) == ["order_id", "user_id", "amount", "status", "version", "created_at"]
+        assert rows[0]["amount"] == "1.5"
+
+        filtered = client.get("/rest/orders/export?user_id=user-a&status=paid")
+        assert [row["order_id"] for row in csv.DictReader(io.StringIO(filtered.text))] == ["export-2"]
+
+        empty = client.get("/rest/orders/export?user_id=nobody")
+        assert empty.text.splitlines() == ["order_id,user_id,amount,status,version,created_at"]
+
+    @pytest.mark.skipif(pq is None, reason="requires pyarrow")
+    def test_export_parquet(self, client):
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+
+        response = client.get("/rest/orders/export?format=parquet&batch_size=2")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+        assert table.column("order_id").to_pylist() == ["export-1", "export-2", "export-3"]
+        assert table.column("amount").to_pylist() == [1.5, 2.5, 3.5]
+        assert str(table.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
+
+        filtered = client.get("/rest/orders/export?format=parquet&user_id=user-b")
+        assert pq.read_table(io.BytesIO(filtered.content)).column("order_id").to_pylist() == ["export-3"]
+
+    def test_export_parquet_without_pyarrow(self, client, monkeypatch):
+        monkeypatch.setattr(export, "pq", None)
+        response = client.get("/rest/orders/export?format=parquet")
+        assert response.status_code == 501
+
+
+class TestOrderAggregates:
+    ORDERS = [
+        {"order_id": "agg-1", "user_id": "user-a", "amount": 1.5},
+        {"order_id": "agg-2", "user_id": "user-a", "amount": 2.5},
+        {"order_id": "agg-3", "user_id": "user-b", "amount": 4.0},
+    ]
+
+    def aggregates(self, client, query: str = ""):
+        response = client.get(f"/rest/orders/aggregate{query}")
+        assert response.status_code == 200
+        return response.json()
+
+    def test_group_by_user_and_status(self, client):
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+        client.patch("/rest/orders/bulk", json=[{"order_id": "agg-2", "status": "paid"}])
+
+        assert self.aggregates(client) == [{"order_count": 3, "total_amount": 8.0}]
+        assert self.aggregates(client, "?group_by=user_id") == [
+            {"user_id": "user-a", "order_count": 2, "total_amount": 4.0},
+            {"user_id": "user-b", "order_count": 1, "total_amount": 4.0},
+        ]
+        assert self.aggregates(client, "?group_by=user_id&group_by=status&user_id=user-a") == [
+            {"user_id": "user-a", "status": "paid", "order_count": 1, "total_amount": 2.5},
+            {"user_id": "user-a", "status": "pending", "order_count": 1, "total_amount": 1.5},
+        ]
+        assert self.aggregates(client, "?status=cancelled") == [{"order_count": 0, "total_amount": 0.0}]
+
+    def test_time_buckets(self, client):
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+        today = datetime.now(timezone.utc).date().isoformat()
+
+        rows = self.aggregates(client, "?bucket=day&group_by=status")
+        assert rows == [{"status": "pending", "bucket": f"{today}T00:00:00", "order_count": 3, "total_amount": 8.0}]
+        assert self.aggregates(client, "?bucket=month")[0]["bucket"] == f"{today[:8]}01T00:00:00"
+
+        tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).replace(tzinfo=None).isoformat()
+        assert self.aggregates(client, f"?bucket=week&created_after={tomorrow}") == []
+        assert client.get("/rest/orders/aggregate?bucket=year").status_code == 422
+
+    def test_summary_table_matches_orders(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "order_summary_enabled", True)
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+        client.post("/rest/orders", json={"order_id": "agg-4", "user_id": "user-b", "amount": 1.0})
+        client.patch("/rest/orders/bulk", json=[
+            {"order_id": "agg-1", "status": "paid"}, {"order_id": "missing", "status": "paid"}
+        ])
+        client.patch("/rest/orders/agg-3", json={"status": "paid"})
+        client.patch("/rest/orders/agg-3", json={"status": "paid"})
+        client.delete("/rest/orders/agg-4")
+
+        expected = [
+            {"user_id": "user-a", "status": "paid", "order_count": 1, "total_amount": 1.5},
+            {"user_id": "user-a", "status": "pending", "order_count": 1, "total_amount": 2.5},
+            {"user_id": "user-b", "status": "paid", "order_count": 1, "total_amount": 4.0},
+        ]
+        query = "?group_by=user_id&group_by=status"
+        assert self.aggregates(client, query) == expected
+        # Time filters are answered from the orders table, with the same totals.
+        assert self.aggregates(client, query + "&created_after=2000-01-01T00:00:00") == expected
+        assert self.aggregates(client, "?status=paid") == [{"order_count": 2, "total_amount": 5.5}]
+
+    def test_rebuild_summary(self, client, monkeypatch):
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+        monkeypatch.setattr(settings, "order_summary_enabled", True)
+        assert self.aggregates(client) == [{"order_count": 0, "total_amount": 0.0}]
+
+        async def rebuild() -> None:
+            async with db.factory.get_session() as session:
+                await OrderDAL.rebuild_summary(session=session)
+
+        asyncio.run(rebuild())
+        assert self.aggregates(client) == [{"order_count": 3, "total_amount": 8.0}]
+
+    def test_rebuild_summary_during_writes(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "order_summary_enabled", True)
+        client.post("/rest/orders/bulk", json=self.ORDERS)
+
+        async def rebuild() -> None:
+            async with db.factory.get_session() as session:
+                await OrderDAL.rebuild_summary(session=session)
+
+        async def create(index: int) -> None:
+            async with db.factory.get_session() as session:
+                await OrderService.create(session=session, order_create=OrderCreateInput(
+                    order_id=f"concurrent-{index}", user_id=f"user-{index % 2}", amount=1.0
+                ))
+
+        async def run() -> None:
+            await asyncio.gather(*(create(i) for i in range(5)), rebuild(), *(create(i) for i in range(5, 10)))
+
+        asyncio.run(run())
+        query = "?group_by=user_id&group_by=status"
+        from_orders = self.aggregates(client, query + "&created_after=2000-01-01T00:00:00")
+        assert self.aggregates(client, query) == from_orders
+        assert sum(row["order_count"] for row in from_orders) == 13
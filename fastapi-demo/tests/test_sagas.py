@@ -0,0 +1,155 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.event_store import EventStore
+from app.services.saga_coordinator import SagaCoordinator, SagaStep, SagaStore
+from app.services.saga_coordinator import validate_saga_steps
+
+
+def make_coordinator(steps: List[SagaStep]) -> SagaCoordinator:
+    return SagaCoordinator(EventStore(), definitions={"test": steps})
+
+
+def record_calls(calls: List[str], step: str, delay: float = 0.0):
+    async def handler(saga_id: str, data: Dict[str, Any]) -> None:
+        await asyncio.sleep(delay)
+        calls.append(step)
+    return handler
+
+
+class TestSagaCoordinator:
+    def test_independent_steps_run_concurrently(self):
+        coordinator = make_coordinator([SagaStep("a"), SagaStep("b")])
+        calls: List[str] = []
+        coordinator.register_step_handler("a", record_calls(calls, "a", delay=0.2))
+        coordinator.register_step_handler("b", record_calls(calls, "b", delay=0.2))
+
+        async def run() -> Any:
+            start = time.perf_counter()
+            saga_id = await coordinator.start_saga("test", {"order_id": "1"})
+            return time.perf_counter() - start, await SagaStore.get(saga_id)
+
+        elapsed, saga = asyncio.run(run())
+        assert elapsed < 0.35
+        assert saga.status == "completed"
+        assert sorted(saga.completed_steps) == ["a", "b"]
+
+    def test_dependent_steps_wait_for_dependencies(self):
+        coordinator = make_coordinator([
+            SagaStep("confirm", depends_on=["reserve", "charge"]),
+            SagaStep("reserve"),
+            SagaStep("charge"),
+        ])
+        calls: List[str] = []
+        coordinator.register_step_handler("reserve", record_calls(calls, "reserve", delay=0.05))
+        coordinator.register_step_handler("charge", record_calls(calls, "charge"))
+        coordinator.register_step_handler("confirm", record_calls(calls, "confirm"))
+
+        asyncio.run(coordinator.start_saga("test", {"order_id": "1"}))
+        assert calls[-1] == "confirm"
+
+    def test_step_is_retried(self):
+        coordinator = make_coordinator([SagaStep("flaky", retries=2, retry_backoff=0.0)])
+        attempts: List[int] = []
+
+        async def flaky(saga_id: str, data: Dict[str, Any]) -> None:
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("unavailable")
+
+        coordinator.register_step_handler("flaky", flaky)
+
+        async def run() -> Any:
+            return await SagaStore.get(await coordinator.start_saga("test", {"order_id": "1"}))
+
+        assert asyncio.run(run()).status == "completed"
+        assert len(attempts) == 3
+
+    def test_timed_out_step_compensates_completed_steps(self):
+        coordinator = make_coordinator([SagaStep("fast"), SagaStep("slow", timeout=0.05)])
+        coordinator.register_step_handler("slow", record_calls([], "slow", delay=1.0))
+
+        async def run() -> Any:
+            saga_id = await coordinator.start_saga("test", {"order_id": "1"})
+            return saga_id, await SagaStore.get(saga_id)
+
+        saga_id, saga = asyncio.run(run())
+        assert saga.status == "failed"
+        assert "slow" in saga.error
+        events = asyncio.run(coordinator.event_store.get_events(saga_id))
+        assert [e.data["step"] for e in events if e.event_type == "SagaStepCompensated"] == ["fast"]
+
+    def test_background_workers_drive_queued_sagas(self):
+        coordinator = make_coordinator([SagaStep("a"), SagaStep("b")])
+
+        async def run() -> Any:
+            await coordinator.start(workers=2, queue_size=10)
+            try:
+                saga_id = await coordinator.start_saga("test", {"order_id": "1"}, wait=False)
+                for _ in range(100):
+                    saga = await SagaStore.get(saga_id)
+                    if saga.status == "completed":
+                        return saga
+                    await asyncio.sleep(0.01)
+            finally:
+                await coordinator.stop()
+
+        saga = asyncio.run(run())
+        assert saga is not None
+        assert sorted(saga.completed_steps) == ["a", "b"]
+
+    def test_saga_left_running_by_a_crash_is_resumed(self):
+        coordinator = make_coordinator([SagaStep("a"), SagaStep("b", depends_on=["a"])])
+        calls: List[str] = []
+        coordinator.register_step_handler("a", record_calls(calls, "a"))
+        coordinator.register_step_handler("b", record_calls(calls, "b"))
+
+        async def run() -> Any:
+            # A process died after recording step a; its lease has expired since.
+            await SagaStore.create(
+                "test_crashed", "test", {"order_id": "crashed"}, status="running", lease_expires_at=time.time() - 1
+            )
+            await SagaStore.transition("test_crashed", ("running",), completed_steps=["a"])
+            # Another process is still driving this one.
+            await SagaStore.create(
+                "test_alive", "test", {"order_id": "alive"}, status="running", lease_expires_at=time.time() + 60
+            )
+
+            await coordinator.start(workers=1, queue_size=10)
+            try:
+                for _ in range(100):
+                    saga = await SagaStore.get("test_crashed")
+                    if saga.status == "completed":
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await coordinator.stop()
+            return saga, await SagaStore.get("test_alive")
+
+        crashed, alive = asyncio.run(run())
+        assert crashed.status == "completed"
+        assert crashed.completed_steps == ["a", "b"]
+        assert calls == ["b"]
+        assert alive.status == "running"
+
+    def test_lease_is_renewed_while_running(self):
+        coordinator = SagaCoordinator(EventStore(), definitions={"test": [SagaStep("slow")]}, lease_seconds=0.15)
+        coordinator.register_step_handler("slow", record_calls([], "slow", delay=0.3))
+
+        async def run() -> Any:
+            task = asyncio.create_task(coordinator.start_saga("test", {"order_id": "1"}))
+            await asyncio.sleep(0.2)
+            reclaimed = await SagaStore.reclaim_expired(time.time())
+            await task
+            return reclaimed, await SagaStore.get("test_1")
+
+        reclaimed, saga = asyncio.run(run())
+        assert reclaimed == []
+        assert saga.status == "completed"
+
+    def test_cyclic_steps_are_rejected(self):
+        with pytest.raises(ValueError):
+            validate_saga_steps([SagaStep("a", depends_on=["b"]), SagaStep("b", depends_on=["a"])])